@@ -0,0 +1,195 @@
+import asyncio
+import math
+from collections import deque
+from functools import lru_cache
+
+from app.core.config import get_settings
+from app.core.metrics import register_collector
+
+_LATENCY_SMOOTHING = 0.2
+_LIMIT_SMOOTHING = 0.2
+# The no-load baseline is the minimum over a window of recent samples, and
+# the limit is left alone until the window holds a few of them.
+_BASELINE_WINDOW = 500
+_WARMUP_SAMPLES = 10
+
+
+class Overloaded(Exception):
+    def __init__(self, retry_after_s: int) -> None:
+        super().__init__(f"Overloaded, retry after {retry_after_s}s")
+        self.retry_after_s = retry_after_s
+
+
+class AdaptiveLimiter:
+    """Concurrency limiter with queue-time shedding and a latency-driven limit.
+
+    Arrivals beyond the current limit wait in a FIFO queue. A request is shed
+    up front when the estimated wait exceeds ``queue_budget_ms``, and again if
+    it actually waits that long. The limit follows a gradient: it grows by
+    about sqrt(limit) while latency stays within ``tolerance`` times the
+    baseline (the minimum latency over a recent window), and shrinks as
+    latency rises beyond that.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_limit: int,
+        min_limit: int,
+        queue_budget_ms: float,
+        tolerance: float,
+    ) -> None:
+        self.name = name
+        self.max_limit = max_limit
+        self.min_limit = min(min_limit, max_limit)
+        self.queue_budget_ms = queue_budget_ms
+        self.tolerance = tolerance
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        self.shed = 0
+        self.latency_ms: float | None = None
+        self.baseline_ms: float | None = None
+        self._samples: deque[float] = deque(maxlen=_BASELINE_WINDOW)
+        self._waiters: deque[asyncio.Future[None]] = deque()
+
+    @property
+    def capacity(self) -> int:
+        return max(self.min_limit, int(self.limit))
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for waiter in self._waiters if not waiter.done())
+
+    def estimated_wait_ms(self) -> float:
+        if self.in_flight < self.capacity and not self.queue_depth:
+            return 0.0
+        # Little's law: a slot frees up every latency / capacity on average.
+        return (self.queue_depth + 1) * (self.latency_ms or 0.0) / self.capacity
+
+    def _overloaded(self, wait_ms: float) -> Overloaded:
+        self.shed += 1
+        return Overloaded(max(1, math.ceil(wait_ms / 1000.0)))
+
+    def reject(self) -> Overloaded:
+        return self._overloaded(self.estimated_wait_ms())
+
+    async def acquire(self) -> None:
+        wait_ms = self.estimated_wait_ms()
+        if wait_ms > self.queue_budget_ms:
+            raise self._overloaded(wait_ms)
+        if self.in_flight < self.capacity and not self.queue_depth:
+            self.in_flight += 1
+            return
+
+        waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # release() hands its slot straight to the waiter, so in_flight is
+            # already accounted for when this returns.
+            await asyncio.wait_for(waiter, self.queue_budget_ms / 1000.0)
+        except TimeoutError:
+            raise self._overloaded(self.queue_budget_ms) from None
+        except BaseException:
+            # Cancelled after the slot was handed over: give it back.
+            if waiter.done() and not waiter.cancelled():
+                self._free_slot()
+            raise
+        finally:
+            if waiter.cancelled() and waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def release(self, latency_ms: float) -> None:
+        self._observe(latency_ms)
+        self._free_slot()
+
+    def _free_slot(self) -> None:
+        self.in_flight -= 1
+        # Admit as many waiters as the current capacity allows, so a limit
+        # that has grown back is used straight away rather than one waiter
+        # per release.
+        while self._waiters and self.in_flight < self.capacity:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def _observe(self, sample_ms: float) -> None:
+        self._samples.append(sample_ms)
+        if self.latency_ms is None:
+            self.latency_ms = sample_ms
+        else:
+            self.latency_ms += _LATENCY_SMOOTHING * (sample_ms - self.latency_ms)
+        if len(self._samples) < _WARMUP_SAMPLES:
+            return
+        self.baseline_ms = min(self._samples)
+        if self.latency_ms <= 0:
+            return
+        gradient = max(0.5, min(1.0, self.tolerance * self.baseline_ms / self.latency_ms))
+        target = self.limit * gradient + math.sqrt(self.limit)
+        self.limit += _LIMIT_SMOOTHING * (target - self.limit)
+        self.limit = max(float(self.min_limit), min(float(self.max_limit), self.limit))
+
+
+class AdmissionController:
+    """Routes requests to per-class limiters, in priority order.
+
+    Classes listed earlier take precedence: a lower-priority request is shed
+    immediately while any higher-priority class has requests queued.
+    """
+
+    def __init__(self, limiters: list[AdaptiveLimiter], routes: dict[str, str]) -> None:
+        self.limiters = limiters
+        self.by_name = {limiter.name: limiter for limiter in limiters}
+        self.routes = routes
+
+    def limiter_for(self, path: str) -> AdaptiveLimiter | None:
+        name = self.routes.get(path)
+        return self.by_name.get(name) if name else None
+
+    async def acquire(self, limiter: AdaptiveLimiter) -> None:
+        for other in self.limiters:
+            if other is limiter:
+                break
+            if other.queue_depth:
+                raise limiter.reject()
+        await limiter.acquire()
+
+    def render_prometheus(self) -> str:
+        series = [
+            ("rag_admission_limit", "gauge", "Current adaptive concurrency limit", "capacity"),
+            ("rag_admission_in_flight", "gauge", "Requests currently admitted", "in_flight"),
+            ("rag_admission_queue_depth", "gauge", "Requests waiting for admission", "queue_depth"),
+            ("rag_admission_shed_total", "counter", "Requests shed with 503", "shed"),
+        ]
+        lines = []
+        for metric, kind, description, attribute in series:
+            lines.append(f"# HELP {metric} {description}")
+            lines.append(f"# TYPE {metric} {kind}")
+            for limiter in self.limiters:
+                value = getattr(limiter, attribute)
+                lines.append(f'{metric}{{class="{limiter.name}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+@lru_cache(maxsize=1)
+def get_admission_controller() -> AdmissionController:
+    settings = get_settings()
+    limiters = [
+        AdaptiveLimiter(
+            "query",
+            max_limit=settings.admission_query_max_concurrency,
+            min_limit=settings.admission_min_concurrency,
+            queue_budget_ms=settings.admission_query_queue_budget_ms,
+            tolerance=settings.admission_latency_tolerance,
+        ),
+        AdaptiveLimiter(
+            "ingest",
+            max_limit=settings.admission_ingest_max_concurrency,
+            min_limit=settings.admission_min_concurrency,
+            queue_budget_ms=settings.admission_ingest_queue_budget_ms,
+            tolerance=settings.admission_latency_tolerance,
+        ),
+    ]
+    controller = AdmissionController(limiters, {"/query": "query", "/ingest": "ingest"})
+    register_collector("admission", controller.render_prometheus)
+    return controller
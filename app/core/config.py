@@ -10,17 +10,49 @@ class Settings(BaseSettings):
     embedding_model_name: str = "sentence-transformers/all-MiniLM-L6-v2"
     fake_embeddings: bool = False
     fake_embedding_dim: int = 64
+    embedding_socket: str | None = None
+    embedding_socket_timeout_s: float = 30.0
+    embedding_max_batch: int = 64
+    embedding_max_wait_ms: float = 0.0
+    embedding_threads: int | None = None
     vector_backend: str = "qdrant"
     qdrant_url: str | None = None
     qdrant_collection: str = "rag_documents"
     postgres_url: str | None = None
     pgvector_table: str = "rag_documents"
+    shard_count: int = 1
+    shard_timeout_ms: float = 500.0
+    qdrant_shard_urls: list[str] = []
+    payload_index_fields: list[str] = ["tenant", "source", "doc_id"]
+    tenant_partitioning: bool = False
     chunk_size: int = 800
     chunk_overlap: int = 120
     top_k: int = 5
+    snippet_window_chars: int = 0
     hybrid_alpha: float = 0.7
+    rerank_strategy: str = "none"
+    rerank_model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    rerank_budget_ms: float = 50.0
+    rerank_max_candidates: int = 100
+    rerank_cache_size: int = 10000
+    rrf_k: int = 60
+    semantic_cache_enabled: bool = False
+    semantic_cache_threshold: float = 0.95
+    semantic_cache_size: int = 1024
+    semantic_cache_ttl_s: float = 300.0
     request_size_limit_mb: int = 5
     rate_limit_per_minute: int = 60
+    admission_enabled: bool = True
+    admission_query_max_concurrency: int = 64
+    admission_ingest_max_concurrency: int = 8
+    admission_min_concurrency: int = 1
+    admission_query_queue_budget_ms: float = 1000.0
+    admission_ingest_queue_budget_ms: float = 5000.0
+    admission_latency_tolerance: float = 2.0
+    admin_token: str | None = None
+    snapshot_path: str | None = None
+    snapshot_batch_size: int = 1000
+    snapshot_upload_limit_mb: int = 2048
 
     model_config = SettingsConfigDict(env_prefix="RAG_")
 
@@ -36,3 +68,8 @@ def validate_settings(settings: Settings) -> None:
         raise ValueError(f"Unsupported vector backend: {settings.vector_backend}")
     if settings.vector_backend.lower() == "pgvector" and not settings.postgres_url:
         raise ValueError("RAG_POSTGRES_URL is required when using pgvector backend")
+    if settings.qdrant_shard_urls and settings.vector_backend.lower() != "qdrant":
+        raise ValueError("RAG_QDRANT_SHARD_URLS is only supported with the qdrant backend")
+    supported_rerankers = {"none", "lexical", "cross_encoder", "rrf"}
+    if settings.rerank_strategy.lower() not in supported_rerankers:
+        raise ValueError(f"Unsupported rerank strategy: {settings.rerank_strategy}")
@@ -1,3 +1,4 @@
+from collections.abc import Callable
 from dataclasses import dataclass
 from threading import Lock
 
@@ -7,19 +8,40 @@ class Metrics:
     ingest_requests: int = 0
     query_requests: int = 0
     errors: int = 0
+    shard_timeouts: int = 0
+    shard_errors: int = 0
+    shard_skips: int = 0
+    semantic_cache_hits: int = 0
+    semantic_cache_misses: int = 0
+    semantic_cache_saved_ms: float = 0.0
 
 
 _metrics = Metrics()
 _lock = Lock()
+_collectors: dict[str, Callable[[], str]] = {}
 
 
-def increment(field: str) -> None:
+def register_collector(name: str, collector: Callable[[], str]) -> None:
+    """Append ``collector``'s Prometheus text to every ``render_prometheus`` call.
+
+    Registering under an existing ``name`` replaces the earlier collector.
+    """
+    _collectors[name] = collector
+
+
+def increment(field: str, amount: float = 1) -> None:
     with _lock:
-        setattr(_metrics, field, getattr(_metrics, field) + 1)
+        setattr(_metrics, field, getattr(_metrics, field) + amount)
 
 
 def render_prometheus() -> str:
+    return _render_counters() + "".join(collector() for collector in _collectors.values())
+
+
+def _render_counters() -> str:
     with _lock:
+        lookups = _metrics.semantic_cache_hits + _metrics.semantic_cache_misses
+        hit_ratio = _metrics.semantic_cache_hits / lookups if lookups else 0.0
         return (
             "# HELP rag_ingest_requests_total Total ingest requests\n"
             "# TYPE rag_ingest_requests_total counter\n"
@@ -30,4 +52,25 @@ def render_prometheus() -> str:
             "# HELP rag_errors_total Total errors\n"
             "# TYPE rag_errors_total counter\n"
             f"rag_errors_total {_metrics.errors}\n"
+            "# HELP rag_shard_timeouts_total Shard searches dropped for missing the timeout\n"
+            "# TYPE rag_shard_timeouts_total counter\n"
+            f"rag_shard_timeouts_total {_metrics.shard_timeouts}\n"
+            "# HELP rag_shard_errors_total Shard searches that raised\n"
+            "# TYPE rag_shard_errors_total counter\n"
+            f"rag_shard_errors_total {_metrics.shard_errors}\n"
+            "# HELP rag_shard_skipped_total Shard searches skipped while all workers were stuck\n"
+            "# TYPE rag_shard_skipped_total counter\n"
+            f"rag_shard_skipped_total {_metrics.shard_skips}\n"
+            "# HELP rag_semantic_cache_hits_total Semantic query cache hits\n"
+            "# TYPE rag_semantic_cache_hits_total counter\n"
+            f"rag_semantic_cache_hits_total {_metrics.semantic_cache_hits}\n"
+            "# HELP rag_semantic_cache_misses_total Semantic query cache misses\n"
+            "# TYPE rag_semantic_cache_misses_total counter\n"
+            f"rag_semantic_cache_misses_total {_metrics.semantic_cache_misses}\n"
+            "# HELP rag_semantic_cache_hit_ratio Semantic query cache hit ratio\n"
+            "# TYPE rag_semantic_cache_hit_ratio gauge\n"
+            f"rag_semantic_cache_hit_ratio {hit_ratio:.4f}\n"
+            "# HELP rag_semantic_cache_saved_ms_total Search latency saved by cache hits\n"
+            "# TYPE rag_semantic_cache_saved_ms_total counter\n"
+            f"rag_semantic_cache_saved_ms_total {_metrics.semantic_cache_saved_ms:.3f}\n"
         )
@@ -5,8 +5,13 @@ from collections.abc import Awaitable, Callable
 
 from fastapi import Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.status import HTTP_413_REQUEST_ENTITY_TOO_LARGE, HTTP_429_TOO_MANY_REQUESTS
+from starlette.status import (
+    HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+    HTTP_429_TOO_MANY_REQUESTS,
+    HTTP_503_SERVICE_UNAVAILABLE,
+)
 
+from app.core.admission import Overloaded, get_admission_controller
 from app.core.config import get_settings
 from app.core.logging import set_request_id
 
@@ -32,7 +37,10 @@ class RequestSizeLimitMiddleware(BaseHTTPMiddleware):
         call_next: Callable[[Request], Awaitable[Response]],
     ) -> Response:
         settings = get_settings()
-        limit_bytes = settings.request_size_limit_mb * 1024 * 1024
+        limit_mb = settings.request_size_limit_mb
+        if request.url.path == "/admin/snapshot":
+            limit_mb = settings.snapshot_upload_limit_mb
+        limit_bytes = limit_mb * 1024 * 1024
         content_length = request.headers.get("content-length")
         if content_length and int(content_length) > limit_bytes:
             return Response(status_code=HTTP_413_REQUEST_ENTITY_TOO_LARGE)
@@ -61,3 +69,29 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
             return Response(status_code=HTTP_429_TOO_MANY_REQUESTS)
         queue.append(now)
         return await call_next(request)
+
+
+class AdmissionMiddleware(BaseHTTPMiddleware):
+    async def dispatch(
+        self,
+        request: Request,
+        call_next: Callable[[Request], Awaitable[Response]],
+    ) -> Response:
+        if not get_settings().admission_enabled:
+            return await call_next(request)
+        controller = get_admission_controller()
+        limiter = controller.limiter_for(request.url.path)
+        if limiter is None:
+            return await call_next(request)
+        try:
+            await controller.acquire(limiter)
+        except Overloaded as exc:
+            return Response(
+                status_code=HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": str(exc.retry_after_s)},
+            )
+        started = time.perf_counter()
+        try:
+            return await call_next(request)
+        finally:
+            limiter.release((time.perf_counter() - started) * 1000.0)
@@ -0,0 +1,15 @@
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class FastJSONResponse(JSONResponse):
+    """Serialises with orjson and skips FastAPI's response_model round-trip.
+
+    Endpoints returning this directly must build JSON-native content
+    themselves; ``response_model`` is then only used for the OpenAPI schema.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
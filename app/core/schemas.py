@@ -1,5 +1,20 @@
+from typing import Literal
+
 from pydantic import BaseModel, ConfigDict, Field
 
+TENANT_PATTERN = r"^[a-z0-9_]{1,64}$"
+
+CitationField = Literal[
+    "doc_id",
+    "chunk_id",
+    "snippet",
+    "score",
+    "dense_score",
+    "keyword_score",
+    "rerank_score",
+    "source",
+]
+
 
 class IngestResponse(BaseModel):
     doc_id: str = Field(..., description="Document identifier")
@@ -8,13 +23,31 @@ class IngestResponse(BaseModel):
 
 class QueryRequest(BaseModel):
     question: str = Field(..., description="User question")
+    tenant: str | None = Field(None, pattern=TENANT_PATTERN, description="Tenant to search")
+    filters: dict[str, str | list[str]] | None = Field(
+        None, description="Exact-match payload filters on indexed fields"
+    )
+    snippet_chars: int | None = Field(
+        None, ge=0, description="Snippet window around matched terms; 0 returns full chunks"
+    )
+    fields: list[CitationField] | None = Field(
+        None, min_length=1, description="Citation fields to return; all fields when omitted"
+    )
+    use_cache: bool = Field(True, description="Allow answers from the semantic query cache")
 
     model_config = ConfigDict(
         json_schema_extra={
             "examples": [
                 {
                     "question": "How does hybrid retrieval work?",
-                }
+                },
+                {
+                    "question": "How are keys rotated?",
+                    "tenant": "acme",
+                    "filters": {"source": ["security_notes.txt"]},
+                    "snippet_chars": 200,
+                    "fields": ["doc_id", "chunk_id", "snippet"],
+                },
             ]
         }
     )
@@ -27,6 +60,7 @@ class Citation(BaseModel):
     score: float
     dense_score: float
     keyword_score: float
+    rerank_score: float | None = None
     source: str | None
 
 
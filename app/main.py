@@ -1,19 +1,38 @@
+import hmac
 import logging
+from pathlib import Path
 from typing import Annotated
 
-from fastapi import FastAPI, File, HTTPException, Request, UploadFile
-from fastapi.responses import JSONResponse, PlainTextResponse
+from fastapi import FastAPI, File, Form, Header, HTTPException, Request, UploadFile
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 
+from app.core.admission import get_admission_controller
 from app.core.config import get_settings, validate_settings
 from app.core.logging import configure_logging
 from app.core.metrics import increment, render_prometheus
-from app.core.middleware import RateLimitMiddleware, RequestIdMiddleware, RequestSizeLimitMiddleware
-from app.core.schemas import Citation, ErrorResponse, IngestResponse, QueryRequest, QueryResponse
+from app.core.middleware import (
+    AdmissionMiddleware,
+    RateLimitMiddleware,
+    RequestIdMiddleware,
+    RequestSizeLimitMiddleware,
+)
+from app.core.responses import FastJSONResponse
+from app.core.schemas import (
+    TENANT_PATTERN,
+    Citation,
+    ErrorResponse,
+    IngestResponse,
+    QueryRequest,
+    QueryResponse,
+)
 from app.services.ingest import ingest_document
-from app.services.retrieval import hybrid_search
-from app.services.storage import get_store
+from app.services.retrieval import hybrid_search, window_snippet
+from app.services.snapshot import iter_snapshot, load_snapshot, load_snapshot_file
+from app.services.storage import ShardsUnavailable, get_store
 
 logger = logging.getLogger(__name__)
+CITATION_FIELDS = list(Citation.model_fields)
 app = FastAPI(title="RAG API Eval Starter")
 settings = get_settings()
 store = get_store()
@@ -23,9 +42,17 @@ store = get_store()
 async def startup() -> None:
     configure_logging(settings.log_level)
     validate_settings(settings)
+    if settings.admission_enabled:
+        get_admission_controller()
     store.ensure_collection()
+    if settings.snapshot_path:
+        if Path(settings.snapshot_path).exists():
+            load_snapshot_file(store, settings.snapshot_path)
+        else:
+            logger.warning("snapshot_missing", extra={"path": settings.snapshot_path})
 
 
+app.add_middleware(AdmissionMiddleware)
 app.add_middleware(RequestIdMiddleware)
 app.add_middleware(RequestSizeLimitMiddleware)
 app.add_middleware(RateLimitMiddleware)
@@ -35,7 +62,9 @@ app.add_middleware(RateLimitMiddleware)
 async def http_exception_handler(request: Request, exc: HTTPException) -> JSONResponse:
     request_id = getattr(request.state, "request_id", None)
     payload = ErrorResponse(code="http_error", message=str(exc.detail), request_id=request_id)
-    return JSONResponse(status_code=exc.status_code, content=payload.model_dump())
+    return JSONResponse(
+        status_code=exc.status_code, content=payload.model_dump(), headers=exc.headers
+    )
 
 
 @app.exception_handler(Exception)
@@ -51,15 +80,26 @@ async def unhandled_exception_handler(request: Request, exc: Exception) -> JSONR
     return JSONResponse(status_code=500, content=payload.model_dump())
 
 
+def _require_admin(token: str | None) -> None:
+    expected = get_settings().admin_token
+    if not expected or not token or not hmac.compare_digest(token, expected):
+        raise HTTPException(status_code=403, detail="Admin access denied")
+
+
 @app.post("/ingest", response_model=IngestResponse)
-async def ingest(file: Annotated[UploadFile, File(...)]) -> IngestResponse:
+async def ingest(
+    file: Annotated[UploadFile, File(...)],
+    tenant: Annotated[str | None, Form(pattern=TENANT_PATTERN)] = None,
+) -> IngestResponse:
     if not file.filename:
         raise HTTPException(status_code=400, detail="Missing filename")
     if not file.filename.lower().endswith((".txt", ".md", ".pdf")):
         raise HTTPException(status_code=400, detail="Unsupported file type")
     try:
         data = await file.read()
-        result = ingest_document(file.filename, data, store)
+        # Chunking, embedding and upserts block, so keep them off the event
+        # loop; otherwise admission control never sees requests queue up.
+        result = await run_in_threadpool(ingest_document, file.filename, data, store, tenant)
         increment("ingest_requests")
         logger.info(
             "ingest_complete",
@@ -72,18 +112,69 @@ async def ingest(file: Annotated[UploadFile, File(...)]) -> IngestResponse:
 
 
 @app.post("/query", response_model=QueryResponse)
-async def query(payload: QueryRequest) -> QueryResponse:
-    results = hybrid_search(payload.question, store)
+async def query(payload: QueryRequest) -> FastJSONResponse:
+    try:
+        results = await run_in_threadpool(
+            hybrid_search,
+            payload.question,
+            store,
+            payload.filters,
+            payload.tenant,
+            payload.use_cache,
+        )
+    except ValueError as exc:
+        increment("errors")
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except ShardsUnavailable as exc:
+        increment("errors")
+        raise HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": "1"}) from exc
     increment("query_requests")
     logger.info("query_complete", extra={"top_k": len(results)})
+
+    window = payload.snippet_chars
+    if window is None:
+        window = settings.snippet_window_chars
+    for item in results:
+        if item["snippet"]:
+            item["snippet"] = window_snippet(item["snippet"], payload.question, window)
     answer = "\n".join(
         [
             "Answer (extractive):",
             *[f"- {item['snippet']}" for item in results[:2]],
         ]
     )
-    citations = [Citation(**item) for item in results]
-    return QueryResponse(answer=answer, citations=citations)
+    # Results are already JSON-native dicts, so they are projected and encoded
+    # directly rather than round-tripped through Citation/QueryResponse models.
+    fields = payload.fields or CITATION_FIELDS
+    citations = [{field: item[field] for field in fields} for item in results]
+    return FastJSONResponse({"answer": answer, "citations": citations})
+
+
+@app.get("/admin/snapshot")
+async def export_snapshot(
+    x_admin_token: Annotated[str | None, Header()] = None,
+) -> StreamingResponse:
+    _require_admin(x_admin_token)
+    return StreamingResponse(
+        iter_snapshot(store, settings.snapshot_batch_size),
+        media_type="application/octet-stream",
+        headers={"content-disposition": 'attachment; filename="rag.snapshot"'},
+    )
+
+
+@app.post("/admin/snapshot")
+async def import_snapshot(
+    file: Annotated[UploadFile, File(...)],
+    x_admin_token: Annotated[str | None, Header()] = None,
+) -> dict:
+    _require_admin(x_admin_token)
+    try:
+        loaded = await run_in_threadpool(load_snapshot, store, file.file)
+    except ValueError as exc:
+        increment("errors")
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    logger.info("snapshot_imported", extra={"points": loaded})
+    return {"points": loaded}
 
 
 @app.get("/health")
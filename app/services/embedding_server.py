@@ -0,0 +1,251 @@
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import socket
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+
+from app.core.config import get_settings
+from app.core.logging import configure_logging
+from app.services.embeddings import embed_local
+
+logger = logging.getLogger(__name__)
+
+# Requests are a u32 length followed by a JSON list of texts. Responses are
+# u32 rows, u32 dim and float32 row-major vectors, or _ERROR, u32 length and
+# a UTF-8 message.
+_FRAME = struct.Struct("<I")
+_MATRIX = struct.Struct("<II")
+_ERROR = 0xFFFFFFFF
+# Connect retries cover the API starting before the server has bound its socket.
+_CONNECT_BACKOFF_S = 0.05
+_CONNECT_BACKOFF_MAX_S = 1.0
+
+
+def _encode(texts: list[str]) -> np.ndarray:
+    return np.asarray(embed_local(texts), dtype="<f4")
+
+
+class EmbeddingServer:
+    """Owns the embedding model and batches requests from every connected worker.
+
+    Inference runs on a single executor thread, so requests that arrive while
+    a batch is encoding queue up and are folded into the next batch.
+    """
+
+    def __init__(self, path: str, max_batch: int, max_wait_ms: float) -> None:
+        self.path = path
+        self.max_batch = max_batch
+        self.max_wait_s = max_wait_ms / 1000.0
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embed")
+        self._queue: asyncio.Queue[tuple[list[str], asyncio.Future[np.ndarray]]] | None = None
+        self._server: asyncio.AbstractServer | None = None
+        self._batcher: asyncio.Task[None] | None = None
+
+    async def start(self) -> None:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.path)
+        self._queue = asyncio.Queue()
+        self._batcher = asyncio.create_task(self._run_batches())
+        self._server = await asyncio.start_unix_server(self._handle, path=self.path)
+        logger.info("embedding_server_started", extra={"socket": self.path})
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._batcher is not None:
+            self._batcher.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._batcher
+        self.executor.shutdown(wait=False)
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.path)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        assert self._queue is not None
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                try:
+                    (size,) = _FRAME.unpack(await reader.readexactly(_FRAME.size))
+                    texts = json.loads(await reader.readexactly(size))
+                except asyncio.IncompleteReadError:
+                    break
+                future: asyncio.Future[np.ndarray] = loop.create_future()
+                await self._queue.put((texts, future))
+                try:
+                    matrix = await future
+                except Exception as exc:
+                    message = str(exc).encode("utf-8")
+                    writer.write(_MATRIX.pack(_ERROR, len(message)) + message)
+                else:
+                    writer.write(_MATRIX.pack(*matrix.shape) + matrix.tobytes())
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def _next_batch(self) -> list[tuple[list[str], asyncio.Future[np.ndarray]]]:
+        assert self._queue is not None
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        size = len(batch[0][0])
+        deadline = loop.time() + self.max_wait_s
+        while size < self.max_batch:
+            try:
+                item = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), remaining)
+                except TimeoutError:
+                    break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    async def _run_batches(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._next_batch()
+            texts = [text for request, _ in batch for text in request]
+            try:
+                matrix = await loop.run_in_executor(self.executor, _encode, texts)
+            except Exception as exc:
+                logger.exception("embedding_batch_failed")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            offset = 0
+            for request, future in batch:
+                if not future.done():
+                    future.set_result(matrix[offset : offset + len(request)])
+                offset += len(request)
+
+
+class EmbeddingClient:
+    """Blocking client with one persistent connection per calling thread.
+
+    Connecting retries with backoff for up to ``timeout`` seconds while the
+    socket is missing or refusing connections.
+    """
+
+    def __init__(self, path: str, timeout: float) -> None:
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connect(self) -> socket.socket:
+        deadline = time.monotonic() + self.timeout
+        delay = _CONNECT_BACKOFF_S
+        while True:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.path)
+            except (FileNotFoundError, ConnectionRefusedError):
+                sock.close()
+                if time.monotonic() + delay > deadline:
+                    raise
+                time.sleep(delay)
+                delay = min(delay * 2, _CONNECT_BACKOFF_MAX_S)
+            else:
+                return sock
+
+    def _socket(self) -> socket.socket:
+        sock: socket.socket | None = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = self._connect()
+            self._local.sock = sock
+        return sock
+
+    def _reset(self) -> None:
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+        self._local.sock = None
+
+    @staticmethod
+    def _recv_exact(sock: socket.socket, size: int) -> bytes:
+        chunks = []
+        while size:
+            chunk = sock.recv(min(size, 1 << 20))
+            if not chunk:
+                raise ConnectionError("Embedding server closed the connection")
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b"".join(chunks)
+
+    def _request(self, request: bytes) -> list[list[float]]:
+        sock = self._socket()
+        sock.sendall(_FRAME.pack(len(request)) + request)
+        rows, dim = _MATRIX.unpack(self._recv_exact(sock, _MATRIX.size))
+        if rows == _ERROR:
+            raise RuntimeError(self._recv_exact(sock, dim).decode("utf-8"))
+        data = self._recv_exact(sock, rows * dim * 4)
+        return np.frombuffer(data, dtype="<f4").reshape(rows, dim).tolist()
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        if not texts:
+            return []
+        request = json.dumps(texts).encode("utf-8")
+        try:
+            return self._request(request)
+        except ConnectionError:
+            # The server may have restarted since this thread last connected.
+            self._reset()
+        except BaseException:
+            self._reset()
+            raise
+        try:
+            return self._request(request)
+        except BaseException:
+            self._reset()
+            raise
+
+
+@lru_cache(maxsize=1)
+def get_client() -> EmbeddingClient:
+    settings = get_settings()
+    if not settings.embedding_socket:
+        raise ValueError("RAG_EMBEDDING_SOCKET is required for the embedding client")
+    return EmbeddingClient(settings.embedding_socket, settings.embedding_socket_timeout_s)
+
+
+async def serve(path: str) -> None:
+    settings = get_settings()
+    if settings.embedding_threads:
+        import torch
+
+        torch.set_num_threads(settings.embedding_threads)
+    server = EmbeddingServer(path, settings.embedding_max_batch, settings.embedding_max_wait_ms)
+    await server.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Run the shared embedding server")
+    parser.add_argument("--socket", default=settings.embedding_socket or "/tmp/rag-embed.sock")
+    args = parser.parse_args()
+    configure_logging(settings.log_level)
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(serve(args.socket))
+
+
+if __name__ == "__main__":
+    main()
@@ -27,9 +27,8 @@ def _fake_embed(text: str, dim: int) -> list[float]:
     return [value / norm for value in vector]
 
 
-def embed_texts(texts: Iterable[str]) -> list[list[float]]:
+def embed_local(values: list[str]) -> list[list[float]]:
     settings = get_settings()
-    values = list(texts)
     if settings.fake_embeddings:
         return [_fake_embed(text, settings.fake_embedding_dim) for text in values]
 
@@ -38,6 +37,16 @@ def embed_texts(texts: Iterable[str]) -> list[list[float]]:
     return [list(map(float, row)) for row in embeddings.tolist()]
 
 
+def embed_texts(texts: Iterable[str]) -> list[list[float]]:
+    settings = get_settings()
+    values = list(texts)
+    if settings.embedding_socket:
+        from app.services.embedding_server import get_client
+
+        return get_client().embed(values)
+    return embed_local(values)
+
+
 def embed_query(text: str) -> list[float]:
     return embed_texts([text])[0]
 
@@ -10,7 +10,7 @@ from app.services.embeddings import embed_texts
 from app.services.storage import BaseStore
 
 
-def _split_text(text: str) -> list[str]:
+def split_text(text: str) -> list[str]:
     settings = get_settings()
     chunk_size = settings.chunk_size
     overlap = min(settings.chunk_overlap, max(0, chunk_size - 1))
@@ -36,12 +36,9 @@ def _read_text_from_file(filename: str, data: bytes) -> str:
     raise ValueError("Unsupported file type")
 
 
-def ingest_document(filename: str, data: bytes, store: BaseStore) -> dict:
-    text = _read_text_from_file(filename, data)
-    doc_id = str(uuid.uuid4())
-    chunks = _split_text(text)
-    embeddings = embed_texts(chunks)
-
+def build_chunk_payloads(
+    doc_id: str, filename: str, chunks: list[str], tenant: str | None = None
+) -> tuple[list[str], list[dict]]:
     ids = []
     payloads = []
     for index, chunk in enumerate(chunks):
@@ -56,6 +53,18 @@ def ingest_document(filename: str, data: bytes, store: BaseStore) -> dict:
                 "source": os.path.basename(filename),
             }
         )
+        if tenant is not None:
+            payloads[-1]["tenant"] = tenant
+    return ids, payloads
 
+
+def ingest_document(
+    filename: str, data: bytes, store: BaseStore, tenant: str | None = None
+) -> dict:
+    text = _read_text_from_file(filename, data)
+    doc_id = str(uuid.uuid4())
+    chunks = split_text(text)
+    embeddings = embed_texts(chunks)
+    ids, payloads = build_chunk_payloads(doc_id, filename, chunks, tenant)
     store.upsert(ids, embeddings, payloads)
     return {"doc_id": doc_id, "chunks": len(chunks)}
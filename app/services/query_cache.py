@@ -0,0 +1,124 @@
+import json
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from threading import Lock
+
+import numpy as np
+
+from app.core.config import get_settings
+from app.services.storage import Filters, corpus_version
+
+
+@dataclass
+class CacheHit:
+    results: list[dict]
+    similarity: float
+    saved_ms: float
+
+
+def cache_scope(filters: Filters | None, tenant: str | None, top_k: int) -> str:
+    return json.dumps([tenant, filters or {}, top_k], sort_keys=True)
+
+
+class SemanticCache:
+    """Nearest-neighbour cache of recent query results keyed by query embedding.
+
+    Entries live in a fixed-size ring of unit vectors and are matched with a
+    single matrix-vector product, which for a few thousand entries is both
+    exact and faster than maintaining an ANN graph. A hit requires the same
+    scope (tenant, filters, top_k), cosine similarity at or above
+    ``threshold``, an unexpired entry, and an unchanged corpus version.
+    """
+
+    def __init__(self, max_entries: int, threshold: float, ttl_s: float) -> None:
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.ttl_s = ttl_s
+        self._vectors: np.ndarray | None = None
+        self._scopes: list[str | None] = [None] * max_entries
+        self._results: list[list[dict]] = [[] for _ in range(max_entries)]
+        self._latency_ms = np.zeros(max_entries)
+        self._expires = np.zeros(max_entries)
+        self._next = 0
+        self._version = corpus_version()
+        self._lock = Lock()
+
+    def _reset(self) -> None:
+        self._expires[:] = 0.0
+        self._scopes = [None] * self.max_entries
+        self._results = [[] for _ in range(self.max_entries)]
+        self._version = corpus_version()
+
+    @staticmethod
+    def _normalise(vector: list[float]) -> np.ndarray | None:
+        array = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(array))
+        if norm == 0:
+            return None
+        return array / norm
+
+    def get(self, vector: list[float], scope: str) -> CacheHit | None:
+        query = self._normalise(vector)
+        if query is None:
+            return None
+        with self._lock:
+            if self._version != corpus_version():
+                self._reset()
+                return None
+            if self._vectors is None or self._vectors.shape[1] != query.shape[0]:
+                return None
+            similarities = self._vectors @ query
+            similarities[self._expires <= time.monotonic()] = -1.0
+            candidates = np.flatnonzero(similarities >= self.threshold)
+            for index in candidates[np.argsort(-similarities[candidates])]:
+                if self._scopes[index] == scope:
+                    results = [dict(item) for item in self._results[index]]
+                    return CacheHit(
+                        results, float(similarities[index]), float(self._latency_ms[index])
+                    )
+        return None
+
+    def put(
+        self,
+        vector: list[float],
+        scope: str,
+        results: list[dict],
+        latency_ms: float,
+        version: int,
+    ) -> None:
+        """Store ``results``, computed against corpus ``version``.
+
+        ``version`` must be read before the search ran; if the corpus has
+        changed since, the results may be stale and are dropped.
+        """
+        entry = self._normalise(vector)
+        if entry is None:
+            return
+        with self._lock:
+            if version != corpus_version():
+                return
+            if self._version != version:
+                self._reset()
+            if self._vectors is None or self._vectors.shape[1] != entry.shape[0]:
+                self._vectors = np.zeros((self.max_entries, entry.shape[0]), dtype=np.float32)
+                self._reset()
+            index = self._next
+            self._next = (self._next + 1) % self.max_entries
+            self._vectors[index] = entry
+            self._scopes[index] = scope
+            self._results[index] = [dict(item) for item in results]
+            self._latency_ms[index] = latency_ms
+            self._expires[index] = time.monotonic() + self.ttl_s
+
+
+@lru_cache(maxsize=1)
+def get_semantic_cache() -> SemanticCache | None:
+    settings = get_settings()
+    if not settings.semantic_cache_enabled:
+        return None
+    return SemanticCache(
+        settings.semantic_cache_size,
+        settings.semantic_cache_threshold,
+        settings.semantic_cache_ttl_s,
+    )
@@ -0,0 +1,259 @@
+import math
+import re
+import time
+from collections import Counter, OrderedDict
+from functools import lru_cache
+from threading import Lock
+from typing import Protocol
+
+from sentence_transformers import CrossEncoder
+
+from app.core.config import get_settings
+from app.services.storage import corpus_version
+
+_TOKEN_RE = re.compile(r"\w+")
+_COST_SMOOTHING = 0.3
+
+
+def _tokens(text: str) -> list[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+class Reranker(Protocol):
+    cacheable: bool
+
+    def score(self, query: str, candidates: list[dict]) -> list[float]:
+        ...
+
+    def normalise(self, score: float) -> float:
+        """Map a raw score into [0, 1] with a fixed, increasing function."""
+        ...
+
+
+class LexicalReranker:
+    """BM25-style term saturation plus a bigram proximity bonus.
+
+    Scores depend only on the (query, chunk) pair, so they are cacheable.
+    """
+
+    cacheable = True
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, avg_len: float = 120.0) -> None:
+        self.k1 = k1
+        self.b = b
+        self.avg_len = avg_len
+
+    def score(self, query: str, candidates: list[dict]) -> list[float]:
+        query_tokens = _tokens(query)
+        terms = set(query_tokens)
+        bigrams = set(zip(query_tokens, query_tokens[1:], strict=False))
+        scores = []
+        for candidate in candidates:
+            tokens = _tokens(candidate.get("snippet") or "")
+            if not tokens or not terms:
+                scores.append(0.0)
+                continue
+            counts = Counter(tokens)
+            norm = self.k1 * (1 - self.b + self.b * len(tokens) / self.avg_len)
+            saturation = sum(counts[t] / (counts[t] + norm) for t in terms) / len(terms)
+            proximity = 0.0
+            if bigrams:
+                present = set(zip(tokens, tokens[1:], strict=False))
+                proximity = len(bigrams & present) / len(bigrams)
+            scores.append(0.7 * saturation + 0.3 * proximity)
+        return scores
+
+    def normalise(self, score: float) -> float:
+        return min(max(score, 0.0), 1.0)
+
+
+@lru_cache(maxsize=1)
+def _cross_encoder() -> CrossEncoder:
+    settings = get_settings()
+    model: CrossEncoder = CrossEncoder(settings.rerank_model_name)
+    return model
+
+
+class CrossEncoderReranker:
+    cacheable = True
+
+    def score(self, query: str, candidates: list[dict]) -> list[float]:
+        pairs = [(query, candidate.get("snippet") or "") for candidate in candidates]
+        return [float(value) for value in _cross_encoder().predict(pairs)]
+
+    def normalise(self, score: float) -> float:
+        # Cross-encoder outputs are logits.
+        return 1.0 / (1.0 + math.exp(-min(max(score, -50.0), 50.0)))
+
+
+class ReciprocalRankFusion:
+    """Fuses the dense and keyword rankings of the candidate set.
+
+    Ranks are relative to the candidate set, so scores are not cacheable.
+    """
+
+    cacheable = False
+
+    def __init__(self, k: int) -> None:
+        self.k = k
+
+    def score(self, query: str, candidates: list[dict]) -> list[float]:
+        scores = [0.0] * len(candidates)
+        for field in ("dense_score", "keyword_score"):
+            order = sorted(range(len(candidates)), key=lambda i: -candidates[i][field])
+            for rank, index in enumerate(order, start=1):
+                scores[index] += 1.0 / (self.k + rank)
+        return scores
+
+    def normalise(self, score: float) -> float:
+        # Two rankings contribute at most 1 / (k + 1) each.
+        return min(max(score * (self.k + 1) / 2.0, 0.0), 1.0)
+
+
+class ScoreCache:
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self._items: OrderedDict[tuple[str, str], float] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: tuple[str, str]) -> float | None:
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key: tuple[str, str], value: float) -> None:
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+class RerankStage:
+    """Second-stage reranking bounded by a per-request latency budget.
+
+    The stage keeps a running estimate of the cost per scored candidate and
+    uses it both to size the first-stage over-fetch and to cap how many
+    uncached candidates are scored in the single reranker batch. Candidates
+    that do not fit in the remaining budget keep their first-stage order
+    behind the reranked ones.
+
+    Raw reranker output goes in ``rerank_score``. ``score`` is rewritten so it
+    stays in [0, 1] and decreasing: each reranker maps its output into [0, 1]
+    with a fixed function, which is then placed in the band above the best
+    unscored blended score.
+    """
+
+    def __init__(
+        self,
+        reranker: Reranker,
+        budget_ms: float,
+        max_candidates: int,
+        cache_size: int,
+    ) -> None:
+        self.reranker = reranker
+        self.budget_ms = budget_ms
+        self.max_candidates = max_candidates
+        self.cache = ScoreCache(cache_size) if reranker.cacheable else None
+        self._cache_version = corpus_version()
+        self.ms_per_candidate = 0.0
+        self._warm = False
+        self._lock = Lock()
+
+    def candidate_limit(self, top_k: int) -> int:
+        ceiling = max(top_k, self.max_candidates)
+        if self.ms_per_candidate <= 0:
+            return ceiling
+        affordable = int(self.budget_ms / self.ms_per_candidate)
+        return max(top_k, min(ceiling, affordable))
+
+    def _observe(self, elapsed_ms: float, scored: int) -> None:
+        if scored == 0:
+            return
+        with self._lock:
+            # The first batch pays for lazy model loading, so it is not a
+            # useful cost sample.
+            if not self._warm:
+                self._warm = True
+                return
+            sample = elapsed_ms / scored
+            if self.ms_per_candidate <= 0:
+                self.ms_per_candidate = sample
+            else:
+                self.ms_per_candidate += _COST_SMOOTHING * (sample - self.ms_per_candidate)
+
+    def rerank(self, query: str, candidates: list[dict], spent_ms: float = 0.0) -> list[dict]:
+        remaining_ms = self.budget_ms - spent_ms
+        if not candidates or remaining_ms <= 0:
+            return candidates
+
+        if self.cache is not None and self._cache_version != corpus_version():
+            # Chunk ids can be reused (snapshot re-imports, deterministic
+            # synthetic ids), so cached scores may describe old text.
+            self._cache_version = corpus_version()
+            self.cache.clear()
+
+        affordable = len(candidates)
+        if self.ms_per_candidate > 0:
+            affordable = int(remaining_ms / self.ms_per_candidate)
+
+        scores: dict[int, float] = {}
+        pending: list[int] = []
+        for index, candidate in enumerate(candidates):
+            key = (query, candidate.get("chunk_id") or "")
+            cached = self.cache.get(key) if self.cache is not None else None
+            if cached is not None:
+                scores[index] = cached
+            elif len(pending) < affordable:
+                pending.append(index)
+
+        if pending:
+            started = time.perf_counter()
+            batch = self.reranker.score(query, [candidates[i] for i in pending])
+            self._observe((time.perf_counter() - started) * 1000.0, len(pending))
+            for index, value in zip(pending, batch, strict=True):
+                scores[index] = value
+                if self.cache is not None:
+                    self.cache.put((query, candidates[index].get("chunk_id") or ""), value)
+
+        reranked = sorted(scores, key=lambda i: scores[i], reverse=True)
+        tail = [candidates[i] for i in range(len(candidates)) if i not in scores]
+        floor = max((float(item["score"]) for item in tail), default=0.0)
+        floor = min(max(floor, 0.0), 1.0)
+        ordered = [
+            {
+                **candidates[i],
+                "score": floor + (1.0 - floor) * self.reranker.normalise(scores[i]),
+                "rerank_score": scores[i],
+            }
+            for i in reranked
+        ]
+        ordered.extend(tail)
+        return ordered
+
+
+@lru_cache(maxsize=1)
+def get_rerank_stage() -> RerankStage | None:
+    settings = get_settings()
+    strategy = settings.rerank_strategy.lower()
+    reranker: Reranker
+    if strategy == "lexical":
+        reranker = LexicalReranker()
+    elif strategy == "cross_encoder":
+        reranker = CrossEncoderReranker()
+    elif strategy == "rrf":
+        reranker = ReciprocalRankFusion(settings.rrf_k)
+    else:
+        return None
+    return RerankStage(
+        reranker,
+        budget_ms=settings.rerank_budget_ms,
+        max_candidates=settings.rerank_max_candidates,
+        cache_size=settings.rerank_cache_size,
+    )
@@ -1,8 +1,36 @@
+import re
+import time
 from collections import Counter
 
 from app.core.config import get_settings
+from app.core.metrics import increment
 from app.services.embeddings import embed_query
-from app.services.storage import BaseStore
+from app.services.query_cache import cache_scope, get_semantic_cache
+from app.services.rerank import get_rerank_stage
+from app.services.storage import BaseStore, Filters, corpus_version, search_was_partial
+
+_WORD_RE = re.compile(r"\w+")
+_STOPWORDS = frozenset(
+    {
+        "about",
+        "and",
+        "are",
+        "does",
+        "for",
+        "from",
+        "how",
+        "the",
+        "this",
+        "that",
+        "what",
+        "when",
+        "where",
+        "which",
+        "who",
+        "why",
+        "with",
+    }
+)
 
 
 def _keyword_score(chunk_tokens: list[str], query_tokens: list[str]) -> float:
@@ -15,11 +43,41 @@ def _keyword_score(chunk_tokens: list[str], query_tokens: list[str]) -> float:
     return score / len(query_tokens)
 
 
-def hybrid_search(query: str, store: BaseStore) -> list[dict]:
+def validate_filters(filters: Filters | None) -> None:
     settings = get_settings()
+    unknown = sorted(set(filters or {}) - set(settings.payload_index_fields))
+    if unknown:
+        raise ValueError(f"Unsupported filter fields: {', '.join(unknown)}")
+
+
+def hybrid_search(
+    query: str,
+    store: BaseStore,
+    filters: Filters | None = None,
+    tenant: str | None = None,
+    use_cache: bool = True,
+) -> list[dict]:
+    settings = get_settings()
+    validate_filters(filters)
+    started = time.perf_counter()
+    stage = get_rerank_stage()
+    limit = stage.candidate_limit(settings.top_k) if stage else settings.top_k * 4
     query_vector = embed_query(query)
+
+    cache = get_semantic_cache() if use_cache else None
+    scope = cache_scope(filters, tenant, settings.top_k)
+    if cache is not None:
+        cached = cache.get(query_vector, scope)
+        if cached is not None:
+            increment("semantic_cache_hits")
+            increment("semantic_cache_saved_ms", cached.saved_ms)
+            return cached.results
+        increment("semantic_cache_misses")
+    search_started = time.perf_counter()
+
     query_tokens = [token.lower() for token in query.split()]
-    dense_hits = store.search(query_vector, limit=settings.top_k * 4)
+    version = corpus_version()
+    dense_hits = store.search(query_vector, limit=limit, filters=filters, tenant=tenant)
 
     results = []
     for hit in dense_hits:
@@ -37,9 +95,49 @@ def hybrid_search(query: str, store: BaseStore) -> list[dict]:
                 "score": blended,
                 "dense_score": float(hit.get("score", 0.0)),
                 "keyword_score": keyword_score,
+                "rerank_score": None,
                 "source": payload.get("source"),
             }
         )
 
     results.sort(key=lambda item: item["score"], reverse=True)
-    return results[: settings.top_k]
+    if stage is not None:
+        spent_ms = (time.perf_counter() - started) * 1000.0
+        results = stage.rerank(query, results, spent_ms)
+    results = results[: settings.top_k]
+    # Results missing a shard are a one-off degradation, not worth replaying.
+    if cache is not None and not search_was_partial(store):
+        latency_ms = (time.perf_counter() - search_started) * 1000.0
+        cache.put(query_vector, scope, results, latency_ms, version)
+    return results
+
+
+def window_snippet(text: str, query: str, size: int) -> str:
+    """Trim ``text`` to about ``size`` chars around the densest run of query terms."""
+    if size <= 0 or len(text) <= size:
+        return text
+    terms = {t for t in _WORD_RE.findall(query.lower()) if len(t) > 2 and t not in _STOPWORDS}
+    positions = [m.start() for m in _WORD_RE.finditer(text) if m.group().lower() in terms]
+
+    start = 0
+    if positions:
+        best, first, last, lo = 0, 0, 0, 0
+        for hi, position in enumerate(positions):
+            while position - positions[lo] >= size:
+                lo += 1
+            if hi - lo + 1 > best:
+                best, first, last = hi - lo + 1, positions[lo], position
+        start = max(0, min((first + last - size) // 2, len(text) - size))
+    end = start + size
+
+    if start > 0:
+        space = text.find(" ", start, end)
+        if space != -1:
+            start = space + 1
+    if end < len(text):
+        space = text.rfind(" ", start, end)
+        if space > start:
+            end = space
+    prefix = "…" if start > 0 else ""
+    suffix = "…" if end < len(text) else ""
+    return f"{prefix}{text[start:end].strip()}{suffix}"
@@ -0,0 +1,173 @@
+import argparse
+import hashlib
+import json
+import logging
+import struct
+import tempfile
+import zlib
+from collections.abc import Iterator
+from pathlib import Path
+from typing import BinaryIO
+
+import numpy as np
+
+from app.services.storage import BaseStore, get_store
+
+logger = logging.getLogger(__name__)
+
+# Layout: header, then one block per store batch, then a footer.
+#   header: MAGIC + u16 version
+#   block:  b"B" + u32 count, u32 dim, u32 raw_len, u32 packed_len, u32 crc32(packed)
+#           + zlib(float32 vectors[count * dim] + JSON [[id, payload], ...])
+#   footer: b"E" + u64 total records + sha256 of every preceding byte
+MAGIC = b"RAGSNAP"
+VERSION = 1
+_HEADER = struct.Struct("<H")
+_BLOCK = struct.Struct("<IIIII")
+_FOOTER = struct.Struct("<Q")
+
+
+def iter_snapshot(store: BaseStore, batch_size: int = 1000) -> Iterator[bytes]:
+    digest = hashlib.sha256()
+    total = 0
+
+    def emit(data: bytes) -> bytes:
+        digest.update(data)
+        return data
+
+    yield emit(MAGIC + _HEADER.pack(VERSION))
+    for ids, vectors, payloads in store.iter_points(batch_size):
+        if not ids:
+            continue
+        matrix = np.asarray(vectors, dtype="<f4")
+        records = json.dumps([[i, p] for i, p in zip(ids, payloads, strict=True)])
+        raw = matrix.tobytes() + records.encode("utf-8")
+        packed = zlib.compress(raw)
+        header = _BLOCK.pack(len(ids), matrix.shape[1], len(raw), len(packed), zlib.crc32(packed))
+        yield emit(b"B" + header)
+        yield emit(packed)
+        total += len(ids)
+    footer = b"E" + _FOOTER.pack(total)
+    digest.update(footer)
+    yield footer + digest.digest()
+
+
+def _read_exact(stream: BinaryIO, size: int) -> bytes:
+    data = stream.read(size)
+    if len(data) != size:
+        raise ValueError("Snapshot is truncated")
+    return data
+
+
+def _iter_blocks(stream: BinaryIO, spool: BinaryIO | None = None) -> Iterator[tuple[int, bytes]]:
+    """Yield ``(count, packed)`` per CRC-checked block, then check the footer.
+
+    Every byte read is also written to ``spool`` when one is given.
+    """
+    digest = hashlib.sha256()
+
+    def read(size: int) -> bytes:
+        data = _read_exact(stream, size)
+        digest.update(data)
+        if spool is not None:
+            spool.write(data)
+        return data
+
+    header = read(len(MAGIC) + _HEADER.size)
+    if not header.startswith(MAGIC):
+        raise ValueError("Not a snapshot file")
+    (version,) = _HEADER.unpack(header[len(MAGIC) :])
+    if version != VERSION:
+        raise ValueError(f"Unsupported snapshot version: {version}")
+
+    seen = 0
+    while True:
+        marker = read(1)
+        if marker == b"E":
+            (total,) = _FOOTER.unpack(read(_FOOTER.size))
+            actual = digest.digest()
+            if read(digest.digest_size) != actual:
+                raise ValueError("Snapshot checksum mismatch")
+            if total != seen:
+                raise ValueError("Snapshot record count mismatch")
+            return
+        if marker != b"B":
+            raise ValueError("Corrupt snapshot block")
+
+        block = read(_BLOCK.size)
+        count, _, _, packed_len, crc = _BLOCK.unpack(block)
+        packed = read(packed_len)
+        if zlib.crc32(packed) != crc:
+            raise ValueError("Snapshot block checksum mismatch")
+        seen += count
+        yield count, block + packed
+
+
+def _decode_block(data: bytes) -> tuple[list[str], list[list[float]], list[dict]]:
+    count, dim, raw_len, _, _ = _BLOCK.unpack(data[: _BLOCK.size])
+    raw = zlib.decompress(data[_BLOCK.size :])
+    if len(raw) != raw_len:
+        raise ValueError("Corrupt snapshot block")
+    split = count * dim * 4
+    vectors = np.frombuffer(raw[:split], dtype="<f4").reshape(count, dim)
+    records = json.loads(raw[split:].decode("utf-8"))
+    return [record[0] for record in records], vectors.tolist(), [record[1] for record in records]
+
+
+def load_snapshot(store: BaseStore, stream: BinaryIO) -> int:
+    """Verify a snapshot in full, then stream it into ``store`` block by block.
+
+    The input is spooled to a temporary file while its block CRCs, record
+    count and trailing SHA-256 are checked, so a corrupt or truncated
+    snapshot raises ``ValueError`` before anything is upserted. A store error
+    during the second pass can still leave earlier blocks loaded.
+    """
+    with tempfile.TemporaryFile() as spool:
+        for _ in _iter_blocks(stream, spool):
+            pass
+        spool.seek(0)
+        loaded = 0
+        for count, data in _iter_blocks(spool):
+            store.upsert(*_decode_block(data))
+            loaded += count
+    return loaded
+
+
+def export_snapshot_file(store: BaseStore, path: str, batch_size: int = 1000) -> None:
+    output_path = Path(path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with output_path.open("wb") as handle:
+        for data in iter_snapshot(store, batch_size):
+            handle.write(data)
+
+
+def load_snapshot_file(store: BaseStore, path: str) -> int:
+    with Path(path).open("rb") as handle:
+        loaded = load_snapshot(store, handle)
+    logger.info("snapshot_loaded", extra={"path": path, "points": loaded})
+    return loaded
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Export or import a store snapshot")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export = subparsers.add_parser("export")
+    export.add_argument("--out", required=True)
+    export.add_argument("--batch-size", type=int, default=1000)
+    load = subparsers.add_parser("import")
+    load.add_argument("--path", required=True)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    store = get_store()
+    store.ensure_collection()
+    if args.command == "export":
+        export_snapshot_file(store, args.out, args.batch_size)
+    else:
+        print(json.dumps({"points": load_snapshot_file(store, args.path)}))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,53 @@
+import hashlib
+import heapq
 import json
+import logging
+import re
 import uuid
-from collections.abc import Iterable
-from typing import Protocol
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextvars import ContextVar
+from threading import Lock
+from typing import Protocol, cast
 
 import psycopg
 from pgvector.psycopg import register_vector
 from qdrant_client import QdrantClient
 from qdrant_client.http import models as rest
+from qdrant_client.http.exceptions import UnexpectedResponse
 
 from app.core.config import get_settings
+from app.core.metrics import increment
+from app.core.schemas import TENANT_PATTERN
 from app.services.embeddings import embed_query
 
+logger = logging.getLogger(__name__)
+
+_IDENTIFIER_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+# Postgres truncates identifiers to NAMEDATALEN - 1 bytes.
+_MAX_IDENTIFIER = 63
+
+Filters = dict[str, str | list[str]]
+
+_corpus_version = 0
+_corpus_lock = Lock()
+
+
+def corpus_version() -> int:
+    """Counter bumped by every upsert in this process, for cache invalidation."""
+    return _corpus_version
+
+
+def _mark_corpus_changed() -> None:
+    global _corpus_version
+    with _corpus_lock:
+        _corpus_version += 1
+
+
+class ShardsUnavailable(RuntimeError):
+    """No shard answered a scatter-gather search."""
+
 
 class BaseStore(Protocol):
     def ensure_collection(self) -> None:
@@ -19,123 +56,494 @@ class BaseStore(Protocol):
     def upsert(self, ids: list[str], vectors: list[list[float]], payloads: list[dict]) -> None:
         ...
 
-    def search(self, vector: list[float], limit: int) -> list[dict]:
+    def search(
+        self,
+        vector: list[float],
+        limit: int,
+        filters: Filters | None = None,
+        tenant: str | None = None,
+    ) -> list[dict]:
+        ...
+
+    def iter_points(
+        self, batch_size: int
+    ) -> Iterator[tuple[list[str], list[list[float]], list[dict]]]:
         ...
 
 
+def check_identifier(name: str) -> str:
+    if not _IDENTIFIER_RE.match(name):
+        raise ValueError(f"Invalid payload field name: {name}")
+    return name
+
+
+def check_tenant(tenant: str) -> str:
+    if not re.match(TENANT_PATTERN, tenant):
+        raise ValueError(f"Invalid tenant: {tenant}")
+    return tenant
+
+
+def bounded_identifier(name: str) -> str:
+    """Return ``name``, or a hash-suffixed prefix of it if it is too long.
+
+    Silent truncation would let two long names collide, so over-long names
+    keep a prefix plus a digest of the full name instead.
+    """
+    if len(name) <= _MAX_IDENTIFIER:
+        return name
+    digest = hashlib.blake2b(name.encode("utf-8"), digest_size=8).hexdigest()
+    return f"{name[: _MAX_IDENTIFIER - len(digest) - 1]}_{digest}"
+
+
+def partition_name(base: str, tenant: str | None) -> str:
+    settings = get_settings()
+    if not settings.tenant_partitioning or tenant is None:
+        return base
+    return bounded_identifier(f"{base}__{check_tenant(tenant)}")
+
+
+def _scoped_filters(filters: Filters | None, tenant: str | None) -> Filters:
+    scoped = dict(filters or {})
+    if tenant is not None and not get_settings().tenant_partitioning:
+        scoped["tenant"] = check_tenant(tenant)
+    return scoped
+
+
+def _group_by_partition(
+    base: str, ids: list[str], vectors: list[list[float]], payloads: list[dict]
+) -> dict[str, tuple[list[str], list[list[float]], list[dict]]]:
+    groups: dict[str, tuple[list[str], list[list[float]], list[dict]]] = defaultdict(
+        lambda: ([], [], [])
+    )
+    for point_id, vector, payload in zip(ids, vectors, payloads, strict=True):
+        group = groups[partition_name(base, payload.get("tenant"))]
+        group[0].append(point_id)
+        group[1].append(vector)
+        group[2].append(payload)
+    return groups
+
+
 class QdrantStore:
-    def __init__(self) -> None:
+    def __init__(self, url: str | None = None, collection: str | None = None) -> None:
         settings = get_settings()
-        if settings.qdrant_url:
-            self.client = QdrantClient(url=settings.qdrant_url)
+        url = url or settings.qdrant_url
+        if url:
+            self.client = QdrantClient(url=url)
         else:
             self.client = QdrantClient(":memory:")
-        self.collection = settings.qdrant_collection
+        self.collection = collection or settings.qdrant_collection
+        # Local mode ignores payload indexes and warns on every creation.
+        self.index_fields = (
+            [check_identifier(name) for name in settings.payload_index_fields] if url else []
+        )
+        self._known: set[str] = set()
 
-    def ensure_collection(self) -> None:
-        if self.collection in [c.name for c in self.client.get_collections().collections]:
+    def _ensure(self, collection: str) -> None:
+        if collection in self._known:
             return
-        vector_size = len(embed_query("dimension check"))
-        self.client.create_collection(
-            collection_name=self.collection,
-            vectors_config=rest.VectorParams(
-                size=vector_size,
-                distance=rest.Distance.COSINE,
-            ),
-        )
+        if not self.client.collection_exists(collection):
+            vector_size = len(embed_query("dimension check"))
+            self.client.create_collection(
+                collection_name=collection,
+                vectors_config=rest.VectorParams(
+                    size=vector_size,
+                    distance=rest.Distance.COSINE,
+                ),
+            )
+        # Index creation is idempotent, so collections created before an
+        # index was configured pick it up on the next start.
+        for field in self.index_fields:
+            self._create_payload_index(collection, field)
+        self._known.add(collection)
+
+    def _create_payload_index(self, collection: str, field: str) -> None:
+        is_tenant = field == "tenant"
+        try:
+            self.client.create_payload_index(
+                collection_name=collection,
+                field_name=field,
+                field_schema=rest.KeywordIndexParams(
+                    type=rest.KeywordIndexType.KEYWORD,
+                    is_tenant=is_tenant,
+                ),
+            )
+        except UnexpectedResponse:
+            if not is_tenant:
+                raise
+            # Qdrant < 1.11 rejects is_tenant; fall back to a plain keyword index.
+            logger.warning("tenant_index_unsupported", extra={"collection": collection})
+            self.client.create_payload_index(
+                collection_name=collection,
+                field_name=field,
+                field_schema=rest.PayloadSchemaType.KEYWORD,
+            )
+
+    def ensure_collection(self) -> None:
+        self._ensure(self.collection)
 
     def upsert(self, ids: list[str], vectors: list[list[float]], payloads: list[dict]) -> None:
-        points = []
-        for point_id, vector, payload in zip(ids, vectors, payloads, strict=True):
-            payload["chunk_id"] = point_id
-            try:
-                qdrant_id: str | int = str(uuid.UUID(point_id))
-            except ValueError:
-                qdrant_id = str(uuid.uuid5(uuid.NAMESPACE_URL, point_id))
-            points.append(rest.PointStruct(id=qdrant_id, vector=vector, payload=payload))
-        self.client.upsert(collection_name=self.collection, points=points)
+        groups = _group_by_partition(self.collection, ids, vectors, payloads)
+        for collection, (group_ids, group_vectors, group_payloads) in groups.items():
+            self._ensure(collection)
+            points = []
+            for point_id, vector, payload in zip(
+                group_ids, group_vectors, group_payloads, strict=True
+            ):
+                payload["chunk_id"] = point_id
+                try:
+                    qdrant_id: str | int = str(uuid.UUID(point_id))
+                except ValueError:
+                    qdrant_id = str(uuid.uuid5(uuid.NAMESPACE_URL, point_id))
+                points.append(rest.PointStruct(id=qdrant_id, vector=vector, payload=payload))
+            self.client.upsert(collection_name=collection, points=points)
+        _mark_corpus_changed()
+
+    def search(
+        self,
+        vector: list[float],
+        limit: int,
+        filters: Filters | None = None,
+        tenant: str | None = None,
+    ) -> list[dict]:
+        collection = partition_name(self.collection, tenant)
+        if collection not in self._known and not self.client.collection_exists(collection):
+            return []
+        conditions: list[rest.Condition] = []
+        for key, value in _scoped_filters(filters, tenant).items():
+            match: rest.Match
+            if isinstance(value, list):
+                match = rest.MatchAny(any=value)
+            else:
+                match = rest.MatchValue(value=value)
+            conditions.append(rest.FieldCondition(key=key, match=match))
+        query_filter = rest.Filter(must=conditions) if conditions else None
 
-    def search(self, vector: list[float], limit: int) -> list[dict]:
         if hasattr(self.client, "query_points"):
             result = self.client.query_points(
-                collection_name=self.collection,
+                collection_name=collection,
                 query=vector,
+                query_filter=query_filter,
                 limit=limit,
                 with_payload=True,
             )
             hits = result.points
         else:
             hits = self.client.search(  # type: ignore[attr-defined]
-                collection_name=self.collection,
+                collection_name=collection,
                 query_vector=vector,
+                query_filter=query_filter,
                 limit=limit,
                 with_payload=True,
             )
         return [{"payload": hit.payload or {}, "score": float(hit.score)} for hit in hits]
 
+    def iter_points(
+        self, batch_size: int
+    ) -> Iterator[tuple[list[str], list[list[float]], list[dict]]]:
+        prefix = f"{self.collection}__"
+        collections = [
+            c.name
+            for c in self.client.get_collections().collections
+            if c.name == self.collection or c.name.startswith(prefix)
+        ]
+        for collection in sorted(collections):
+            offset = None
+            while True:
+                points, offset = self.client.scroll(
+                    collection_name=collection,
+                    limit=batch_size,
+                    offset=offset,
+                    with_payload=True,
+                    with_vectors=True,
+                )
+                payloads = [point.payload or {} for point in points]
+                ids = [
+                    payload.get("chunk_id") or str(point.id)
+                    for point, payload in zip(points, payloads, strict=True)
+                ]
+                vectors = [cast(list[float], point.vector) for point in points]
+                yield ids, vectors, payloads
+                if offset is None:
+                    break
+
 
 class PgvectorStore:
-    def __init__(self) -> None:
+    def __init__(self, table: str | None = None) -> None:
         settings = get_settings()
         if not settings.postgres_url:
             raise ValueError("RAG_POSTGRES_URL is required for pgvector backend")
         self.dsn = settings.postgres_url
-        self.table = settings.pgvector_table
+        self.table = bounded_identifier(table or settings.pgvector_table)
+        self.index_fields = [check_identifier(name) for name in settings.payload_index_fields]
+        self._known: set[str] = set()
 
     def _connect(self) -> psycopg.Connection:
         conn = psycopg.connect(self.dsn)
         register_vector(conn)
         return conn
 
-    def ensure_collection(self) -> None:
+    def _ensure(self, table: str) -> None:
+        if table in self._known:
+            return
         vector_size = len(embed_query("dimension check"))
         with self._connect() as conn, conn.cursor() as cur:
             cur.execute("CREATE EXTENSION IF NOT EXISTS vector")
             cur.execute(
                 f"""
-                CREATE TABLE IF NOT EXISTS {self.table} (
+                CREATE TABLE IF NOT EXISTS {table} (
                     id TEXT PRIMARY KEY,
                     embedding VECTOR({vector_size}),
                     payload JSONB
                 )
                 """
             )
+            for field in self.index_fields:
+                index = bounded_identifier(f"{table}_{field}_idx")
+                cur.execute(
+                    f"CREATE INDEX IF NOT EXISTS {index} ON {table} ((payload->>'{field}'))"
+                )
             conn.commit()
+        self._known.add(table)
+
+    def ensure_collection(self) -> None:
+        self._ensure(self.table)
 
     def upsert(self, ids: list[str], vectors: list[list[float]], payloads: list[dict]) -> None:
-        rows: Iterable[tuple[str, list[float], str]] = [
-            (point_id, vector, json.dumps(payload))
-            for point_id, vector, payload in zip(ids, vectors, payloads, strict=True)
-        ]
-        with self._connect() as conn, conn.cursor() as cur:
-            cur.executemany(
-                f"""
-                INSERT INTO {self.table} (id, embedding, payload)
-                VALUES (%s, %s, %s)
-                ON CONFLICT (id)
-                DO UPDATE SET embedding = EXCLUDED.embedding, payload = EXCLUDED.payload
-                """,
-                rows,
-            )
-            conn.commit()
+        groups = _group_by_partition(self.table, ids, vectors, payloads)
+        for table, (group_ids, group_vectors, group_payloads) in groups.items():
+            self._ensure(table)
+            rows: Iterable[tuple[str, list[float], str]] = [
+                (point_id, vector, json.dumps(payload))
+                for point_id, vector, payload in zip(
+                    group_ids, group_vectors, group_payloads, strict=True
+                )
+            ]
+            with self._connect() as conn, conn.cursor() as cur:
+                cur.executemany(
+                    f"""
+                    INSERT INTO {table} (id, embedding, payload)
+                    VALUES (%s, %s, %s)
+                    ON CONFLICT (id)
+                    DO UPDATE SET embedding = EXCLUDED.embedding, payload = EXCLUDED.payload
+                    """,
+                    rows,
+                )
+                conn.commit()
+        _mark_corpus_changed()
 
-    def search(self, vector: list[float], limit: int) -> list[dict]:
+    def search(
+        self,
+        vector: list[float],
+        limit: int,
+        filters: Filters | None = None,
+        tenant: str | None = None,
+    ) -> list[dict]:
+        table = partition_name(self.table, tenant)
+        clauses = []
+        params: list = []
+        for key, value in _scoped_filters(filters, tenant).items():
+            clauses.append(f"payload->>'{check_identifier(key)}' = ANY(%s)")
+            params.append(value if isinstance(value, list) else [value])
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
         with self._connect() as conn, conn.cursor() as cur:
+            if table not in self._known:
+                cur.execute("SELECT to_regclass(%s)", (table,))
+                row = cur.fetchone()
+                if row is None or row[0] is None:
+                    return []
+                self._known.add(table)
             cur.execute(
                 f"""
                 SELECT payload, 1 - (embedding <=> %s) AS score
-                FROM {self.table}
+                FROM {table}
+                {where}
                 ORDER BY embedding <=> %s
                 LIMIT %s
                 """,
-                (vector, vector, limit),
+                (vector, *params, vector, limit),
             )
             rows = cur.fetchall()
         return [{"payload": payload or {}, "score": float(score)} for payload, score in rows]
 
+    def iter_points(
+        self, batch_size: int
+    ) -> Iterator[tuple[list[str], list[list[float]], list[dict]]]:
+        with self._connect() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    SELECT tablename FROM pg_tables
+                    WHERE schemaname = current_schema()
+                    AND (tablename = %s OR starts_with(tablename, %s))
+                    ORDER BY tablename
+                    """,
+                    (self.table, f"{self.table}__"),
+                )
+                tables = [row[0] for row in cur.fetchall()]
+            for table in tables:
+                with conn.cursor(name=f"{table}_snapshot") as cur:
+                    cur.execute(f"SELECT id, embedding, payload FROM {table} ORDER BY id")
+                    while rows := cur.fetchmany(batch_size):
+                        yield (
+                            [row[0] for row in rows],
+                            [row[1].tolist() for row in rows],
+                            [row[2] or {} for row in rows],
+                        )
 
-def get_store() -> BaseStore:
+
+class ShardedStore:
+    """Hash-routes points across shard stores and scatter-gathers searches.
+
+    Every shard is searched concurrently on its own executor, sized for the
+    expected query concurrency, so a stalled shard can only tie up its own
+    threads. Searches that queue for a worker still count against the
+    per-shard timeout. Shards that fail or miss the timeout are logged and
+    counted, and the merged top-k is built from whichever shards answered in
+    time; ``search_was_partial`` reports when that happened. A shard whose
+    workers are all stuck in searches that already timed out is skipped
+    until they return. If no shard answers, ``ShardsUnavailable`` is raised.
+    """
+
+    def __init__(self, shards: list[BaseStore], timeout_ms: float, max_workers: int = 64) -> None:
+        if not shards:
+            raise ValueError("ShardedStore requires at least one shard")
+        self.shards = shards
+        self.timeout_s = timeout_ms / 1000.0
+        self.max_workers = max_workers
+        self.executors = [
+            ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"shard{index}")
+            for index in range(len(shards))
+        ]
+        self.upsert_executor = ThreadPoolExecutor(
+            max_workers=len(shards), thread_name_prefix="shard-upsert"
+        )
+        self._stuck = [0] * len(shards)
+        self._lock = Lock()
+        self._partial: ContextVar[bool] = ContextVar(f"shard_partial_{id(self)}", default=False)
+
+    def shard_for(self, point_id: str) -> int:
+        digest = hashlib.blake2b(point_id.encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "big") % len(self.shards)
+
+    def ensure_collection(self) -> None:
+        for shard in self.shards:
+            shard.ensure_collection()
+
+    def upsert(self, ids: list[str], vectors: list[list[float]], payloads: list[dict]) -> None:
+        groups: dict[int, tuple[list[str], list[list[float]], list[dict]]] = defaultdict(
+            lambda: ([], [], [])
+        )
+        for point_id, vector, payload in zip(ids, vectors, payloads, strict=True):
+            group = groups[self.shard_for(point_id)]
+            group[0].append(point_id)
+            group[1].append(vector)
+            group[2].append(payload)
+        futures = [
+            self.upsert_executor.submit(self.shards[index].upsert, *group)
+            for index, group in groups.items()
+        ]
+        for future in futures:
+            future.result()
+
+    def _submit_search(
+        self,
+        index: int,
+        vector: list[float],
+        limit: int,
+        filters: Filters | None,
+        tenant: str | None,
+    ) -> Future[list[dict]] | None:
+        with self._lock:
+            if self._stuck[index] >= self.max_workers:
+                return None
+        return self.executors[index].submit(
+            self.shards[index].search, vector, limit, filters, tenant
+        )
+
+    def _mark_stuck(self, index: int, future: Future[list[dict]]) -> None:
+        with self._lock:
+            self._stuck[index] += 1
+        future.add_done_callback(lambda _: self._unstick(index))
+
+    def _unstick(self, index: int) -> None:
+        with self._lock:
+            self._stuck[index] -= 1
+
+    def search(
+        self,
+        vector: list[float],
+        limit: int,
+        filters: Filters | None = None,
+        tenant: str | None = None,
+    ) -> list[dict]:
+        futures: dict[Future[list[dict]], int] = {}
+        dropped = 0
+        for index in range(len(self.shards)):
+            future = self._submit_search(index, vector, limit, filters, tenant)
+            if future is None:
+                dropped += 1
+                increment("shard_skips")
+                logger.warning("shard_search_skipped", extra={"shard": index})
+            else:
+                futures[future] = index
+        done, pending = wait(futures, timeout=self.timeout_s)
+        hits: list[dict] = []
+        for future in done:
+            try:
+                hits.extend(future.result())
+            except Exception:
+                dropped += 1
+                increment("shard_errors")
+                logger.exception("shard_search_failed", extra={"shard": futures[future]})
+        for future in pending:
+            # Queued searches are cancelled; running ones hold a worker until
+            # they return.
+            if not future.cancel():
+                self._mark_stuck(futures[future], future)
+            dropped += 1
+            increment("shard_timeouts")
+            logger.warning("shard_search_timeout", extra={"shard": futures[future]})
+        self._partial.set(dropped > 0)
+        if dropped == len(self.shards):
+            raise ShardsUnavailable("No shard answered the search")
+        return heapq.nlargest(limit, hits, key=lambda hit: hit["score"])
+
+    def last_search_partial(self) -> bool:
+        return self._partial.get()
+
+    def iter_points(
+        self, batch_size: int
+    ) -> Iterator[tuple[list[str], list[list[float]], list[dict]]]:
+        for shard in self.shards:
+            yield from shard.iter_points(batch_size)
+
+
+def search_was_partial(store: BaseStore) -> bool:
+    """Whether ``store``'s last search in this context dropped any shard."""
+    return isinstance(store, ShardedStore) and store.last_search_partial()
+
+
+def _backend_store(index: int | None = None) -> BaseStore:
     settings = get_settings()
     if settings.vector_backend.lower() == "pgvector":
-        return PgvectorStore()
-    return QdrantStore()
+        if index is None:
+            return PgvectorStore()
+        return PgvectorStore(table=f"{settings.pgvector_table}_shard{index}")
+    if index is None:
+        return QdrantStore()
+    urls = settings.qdrant_shard_urls
+    return QdrantStore(
+        url=urls[index] if urls else None,
+        collection=f"{settings.qdrant_collection}_shard{index}",
+    )
+
+
+def get_store() -> BaseStore:
+    settings = get_settings()
+    shard_count = len(settings.qdrant_shard_urls) or settings.shard_count
+    if shard_count <= 1:
+        return _backend_store()
+    shards = [_backend_store(index) for index in range(shard_count)]
+    return ShardedStore(
+        shards, settings.shard_timeout_ms, max_workers=settings.admission_query_max_concurrency
+    )
@@ -1,11 +1,50 @@
+import argparse
+import itertools
 import json
+import math
+import random
+from collections.abc import Iterator
+from dataclasses import dataclass
 from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from app.services.storage import BaseStore
+
+_CONSONANTS = "bcdfghjklmnprstvwxz"
+_VOWELS = "aeiou"
+_SYLLABLES = [c + v for c in _CONSONANTS for v in _VOWELS]
+_DOC_LENGTH_DISTRIBUTIONS = ("fixed", "uniform", "lognormal")
+
+
+@dataclass(frozen=True)
+class SyntheticSpec:
+    seed: int = 0
+    documents: int = 1000
+    vocab_size: int = 5000
+    zipf_exponent: float = 1.1
+    doc_length: str = "lognormal"
+    mean_doc_words: int = 400
+    doc_length_sigma: float = 0.5
+    sentence_words: int = 12
+    question_rate: float = 0.05
 
 
 def _sentences(text: str) -> list[str]:
     return [s.strip() for s in text.replace("\n", " ").split(".") if len(s.strip()) > 20]
 
 
+def _question_record(sentence: str) -> dict:
+    subject = sentence.split(" ")[0:5]
+    question = f"What does the documentation say about {' '.join(subject)}?"
+    return {
+        "question": question,
+        "answer": sentence,
+        "contexts": [sentence],
+        "ground_truths": [sentence],
+    }
+
+
 def generate(dataset_path: str, docs_path: str, total: int = 30) -> None:
     docs_dir = Path(docs_path)
     sentences = []
@@ -17,19 +56,7 @@ def generate(dataset_path: str, docs_path: str, total: int = 30) -> None:
     if not sentences:
         raise ValueError("No documents found for dataset generation")
 
-    records = []
-    for idx in range(total):
-        sentence = sentences[idx % len(sentences)]
-        subject = sentence.split(" ")[0:5]
-        question = f"What does the documentation say about {' '.join(subject)}?"
-        records.append(
-            {
-                "question": question,
-                "answer": sentence,
-                "contexts": [sentence],
-                "ground_truths": [sentence],
-            }
-        )
+    records = [_question_record(sentences[idx % len(sentences)]) for idx in range(total)]
 
     output_path = Path(dataset_path)
     output_path.parent.mkdir(parents=True, exist_ok=True)
@@ -38,5 +65,203 @@ def generate(dataset_path: str, docs_path: str, total: int = 30) -> None:
             handle.write(json.dumps(record) + "\n")
 
 
+def _vocabulary(size: int) -> list[str]:
+    # Bijective base-N encoding over syllables gives every rank a distinct,
+    # pronounceable token without needing a seed or a word list.
+    words = []
+    for rank in range(size):
+        value = rank + len(_SYLLABLES)
+        parts = []
+        while value:
+            value, digit = divmod(value, len(_SYLLABLES))
+            parts.append(_SYLLABLES[digit])
+        words.append("".join(reversed(parts)))
+    return words
+
+
+def _doc_word_count(spec: SyntheticSpec, rng: random.Random) -> int:
+    if spec.doc_length == "fixed":
+        count = spec.mean_doc_words
+    elif spec.doc_length == "uniform":
+        count = rng.randint(spec.mean_doc_words // 2, spec.mean_doc_words * 3 // 2)
+    else:
+        mu = math.log(spec.mean_doc_words) - spec.doc_length_sigma**2 / 2
+        count = int(rng.lognormvariate(mu, spec.doc_length_sigma))
+    return max(spec.sentence_words, count)
+
+
+def validate_spec(spec: SyntheticSpec) -> None:
+    if spec.doc_length not in _DOC_LENGTH_DISTRIBUTIONS:
+        raise ValueError(f"Unsupported document length distribution: {spec.doc_length}")
+    if spec.documents < 0 or spec.vocab_size < 1:
+        raise ValueError("documents must be >= 0 and vocab_size must be >= 1")
+    if spec.mean_doc_words < 1 or spec.sentence_words < 1:
+        raise ValueError("mean_doc_words and sentence_words must be >= 1")
+    if spec.zipf_exponent < 0 or spec.doc_length_sigma < 0:
+        raise ValueError("zipf_exponent and doc_length_sigma must be >= 0")
+    if not 0.0 <= spec.question_rate <= 1.0:
+        raise ValueError("question_rate must be between 0 and 1")
+
+
+def iter_synthetic(spec: SyntheticSpec) -> Iterator[tuple[dict, dict | None]]:
+    """Yield ``(document, question)`` pairs; ``question`` is ``None`` for most documents.
+
+    Each document draws from its own RNG seeded by ``(seed, index)``, so any
+    slice of the corpus is reproducible without generating the prefix, and
+    memory stays bounded by the vocabulary rather than the corpus size.
+    """
+    validate_spec(spec)
+    vocabulary = _vocabulary(spec.vocab_size)
+    cum_weights = list(
+        itertools.accumulate(
+            1.0 / (rank**spec.zipf_exponent) for rank in range(1, spec.vocab_size + 1)
+        )
+    )
+    low = max(1, spec.sentence_words // 2)
+    high = max(low, spec.sentence_words * 3 // 2)
+
+    for index in range(spec.documents):
+        rng = random.Random(f"{spec.seed}:{index}")
+        remaining = _doc_word_count(spec, rng)
+        sentences = []
+        while remaining > 0:
+            length = min(remaining, rng.randint(low, high))
+            words = rng.choices(vocabulary, cum_weights=cum_weights, k=length)
+            sentences.append(" ".join(words))
+            remaining -= length
+
+        doc_id = f"synthetic-{spec.seed}-{index:08d}"
+        document = {
+            "doc_id": doc_id,
+            "source": f"{doc_id}.txt",
+            "text": ". ".join(sentences) + ".",
+        }
+        question = None
+        if rng.random() < spec.question_rate:
+            question = _question_record(rng.choice(sentences))
+            question["doc_id"] = doc_id
+        yield document, question
+
+
+def write_synthetic(spec: SyntheticSpec, corpus_path: str, questions_path: str) -> dict:
+    counts = {"documents": 0, "questions": 0}
+    paths = [Path(corpus_path), Path(questions_path)]
+    for path in paths:
+        path.parent.mkdir(parents=True, exist_ok=True)
+    with (
+        paths[0].open("w", encoding="utf-8") as corpus,
+        paths[1].open("w", encoding="utf-8") as questions,
+    ):
+        for document, question in iter_synthetic(spec):
+            corpus.write(json.dumps(document) + "\n")
+            counts["documents"] += 1
+            if question is not None:
+                questions.write(json.dumps(question) + "\n")
+                counts["questions"] += 1
+    return counts
+
+
+def load_synthetic(
+    spec: SyntheticSpec,
+    store: "BaseStore",
+    questions_path: str,
+    batch_size: int = 256,
+) -> dict:
+    from app.services.embeddings import embed_texts
+    from app.services.ingest import build_chunk_payloads, split_text
+
+    if batch_size < 1:
+        raise ValueError("batch_size must be >= 1")
+    counts = {"documents": 0, "chunks": 0, "questions": 0}
+    ids: list[str] = []
+    texts: list[str] = []
+    payloads: list[dict] = []
+
+    def flush() -> None:
+        if ids:
+            store.upsert(ids, embed_texts(texts), payloads)
+            counts["chunks"] += len(ids)
+            ids.clear()
+            texts.clear()
+            payloads.clear()
+
+    output_path = Path(questions_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with output_path.open("w", encoding="utf-8") as questions:
+        for document, question in iter_synthetic(spec):
+            chunks = split_text(document["text"])
+            chunk_ids, chunk_payloads = build_chunk_payloads(
+                document["doc_id"], document["source"], chunks
+            )
+            ids.extend(chunk_ids)
+            texts.extend(chunks)
+            payloads.extend(chunk_payloads)
+            counts["documents"] += 1
+            if question is not None:
+                questions.write(json.dumps(question) + "\n")
+                counts["questions"] += 1
+            if len(ids) >= batch_size:
+                flush()
+        flush()
+    return counts
+
+
+def parse_args() -> argparse.Namespace:
+    defaults = SyntheticSpec()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dataset", default="data/eval.jsonl")
+    parser.add_argument("--docs", default="data/sample_docs")
+    parser.add_argument("--total", type=int, default=30)
+    parser.add_argument("--synthetic", action="store_true", help="Generate a synthetic corpus")
+    parser.add_argument("--corpus-out", default="data/synthetic/corpus.jsonl")
+    parser.add_argument("--questions-out", default="data/synthetic/questions.jsonl")
+    parser.add_argument(
+        "--into-store",
+        action="store_true",
+        help="Chunk, embed and upsert into the configured store instead of writing a corpus file",
+    )
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--documents", type=int, default=defaults.documents)
+    parser.add_argument("--vocab-size", type=int, default=defaults.vocab_size)
+    parser.add_argument("--zipf-exponent", type=float, default=defaults.zipf_exponent)
+    parser.add_argument(
+        "--doc-length", choices=_DOC_LENGTH_DISTRIBUTIONS, default=defaults.doc_length
+    )
+    parser.add_argument("--mean-doc-words", type=int, default=defaults.mean_doc_words)
+    parser.add_argument("--doc-length-sigma", type=float, default=defaults.doc_length_sigma)
+    parser.add_argument("--sentence-words", type=int, default=defaults.sentence_words)
+    parser.add_argument("--question-rate", type=float, default=defaults.question_rate)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if not args.synthetic:
+        generate(args.dataset, args.docs, args.total)
+        return
+
+    spec = SyntheticSpec(
+        seed=args.seed,
+        documents=args.documents,
+        vocab_size=args.vocab_size,
+        zipf_exponent=args.zipf_exponent,
+        doc_length=args.doc_length,
+        mean_doc_words=args.mean_doc_words,
+        doc_length_sigma=args.doc_length_sigma,
+        sentence_words=args.sentence_words,
+        question_rate=args.question_rate,
+    )
+    if args.into_store:
+        from app.services.storage import get_store
+
+        store = get_store()
+        store.ensure_collection()
+        counts = load_synthetic(spec, store, args.questions_out, args.batch_size)
+    else:
+        counts = write_synthetic(spec, args.corpus_out, args.questions_out)
+    print(json.dumps(counts))
+
+
 if __name__ == "__main__":
-    generate("data/eval.jsonl", "data/sample_docs")
+    main()
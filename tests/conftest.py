@@ -1,4 +1,40 @@
 import sys
+import time
 from pathlib import Path
 
+import pytest
+
 sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.core.config import get_settings  # noqa: E402
+from app.services.storage import QdrantStore  # noqa: E402
+
+
+@pytest.fixture
+def fake_embeddings(monkeypatch):
+    """Deterministic local embeddings and an in-memory Qdrant store."""
+    monkeypatch.setenv("RAG_FAKE_EMBEDDINGS", "1")
+    monkeypatch.delenv("RAG_QDRANT_URL", raising=False)
+    get_settings.cache_clear()
+    yield monkeypatch
+    get_settings.cache_clear()
+
+
+class FakeShard(QdrantStore):
+    """In-memory shard whose searches can be delayed or made to fail."""
+
+    def __init__(self, delay_s: float = 0.0, fail: bool = False) -> None:
+        super().__init__()
+        self.delay_s = delay_s
+        self.fail = fail
+
+    def search(self, vector, limit, filters=None, tenant=None):
+        time.sleep(self.delay_s)
+        if self.fail:
+            raise ConnectionError("shard down")
+        return super().search(vector, limit, filters, tenant)
+
+
+@pytest.fixture
+def make_shard(fake_embeddings):
+    return FakeShard
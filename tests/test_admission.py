@@ -0,0 +1,159 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.core.admission import (
+    AdaptiveLimiter,
+    AdmissionController,
+    Overloaded,
+    get_admission_controller,
+)
+from app.core.config import get_settings
+
+
+def _limiter(name: str = "query", max_limit: int = 2, budget_ms: float = 50.0) -> AdaptiveLimiter:
+    return AdaptiveLimiter(
+        name, max_limit=max_limit, min_limit=1, queue_budget_ms=budget_ms, tolerance=2.0
+    )
+
+
+def test_queued_request_is_admitted_on_release() -> None:
+    async def scenario() -> None:
+        limiter = _limiter(max_limit=1, budget_ms=1000.0)
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter.queue_depth == 1
+        limiter.release(5.0)
+        await waiter
+        assert limiter.in_flight == 1
+        assert limiter.queue_depth == 0
+
+    asyncio.run(scenario())
+
+
+def test_recovered_limit_admits_all_fitting_waiters() -> None:
+    async def scenario() -> None:
+        limiter = _limiter(max_limit=8, budget_ms=1000.0)
+        limiter.limit = 1.0
+        await limiter.acquire()
+        waiters = [asyncio.create_task(limiter.acquire()) for _ in range(6)]
+        await asyncio.sleep(0)
+        assert limiter.queue_depth == 6
+
+        limiter.limit = 8.0
+        limiter.release(5.0)
+        await asyncio.gather(*waiters)
+        assert limiter.capacity == 8
+        assert limiter.in_flight == 6
+        assert limiter.queue_depth == 0
+
+        await limiter.acquire()
+        assert limiter.in_flight == 7
+
+    asyncio.run(scenario())
+
+
+def test_sheds_when_queue_budget_is_exceeded() -> None:
+    async def scenario() -> None:
+        limiter = _limiter(max_limit=1, budget_ms=20.0)
+        await limiter.acquire()
+        with pytest.raises(Overloaded):
+            await limiter.acquire()
+        assert limiter.queue_depth == 0
+
+        limiter.latency_ms = 5000.0
+        with pytest.raises(Overloaded) as exc:
+            await limiter.acquire()
+        assert exc.value.retry_after_s == 5
+        assert limiter.shed == 2
+
+    asyncio.run(scenario())
+
+
+def test_limit_tracks_latency() -> None:
+    limiter = _limiter(max_limit=64)
+    for _ in range(5):
+        limiter._observe(10.0)
+    assert limiter.capacity == 64
+    for _ in range(30):
+        limiter._observe(100.0)
+    assert limiter.capacity < 32
+    for _ in range(200):
+        limiter._observe(10.0)
+    assert limiter.capacity == 64
+
+
+def test_baseline_waits_for_warmup_window() -> None:
+    limiter = _limiter(max_limit=64)
+    limiter._observe(500.0)
+    assert limiter.baseline_ms is None
+    for _ in range(20):
+        limiter._observe(10.0)
+    assert limiter.baseline_ms == 10.0
+
+
+def test_lower_priority_class_yields_to_queued_queries() -> None:
+    async def scenario() -> None:
+        query, ingest = _limiter("query", max_limit=1, budget_ms=1000.0), _limiter("ingest")
+        controller = AdmissionController([query, ingest], {"/query": "query", "/ingest": "ingest"})
+        await controller.acquire(query)
+        waiter = asyncio.create_task(controller.acquire(query))
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded):
+            await controller.acquire(ingest)
+        assert 'rag_admission_shed_total{class="ingest"} 1' in controller.render_prometheus()
+        waiter.cancel()
+
+    asyncio.run(scenario())
+
+
+@pytest.fixture
+def slow_app(monkeypatch):
+    def configure(max_concurrency: int, queue_budget_ms: float):
+        monkeypatch.setenv("RAG_ADMISSION_QUERY_MAX_CONCURRENCY", str(max_concurrency))
+        monkeypatch.setenv("RAG_ADMISSION_QUERY_QUEUE_BUDGET_MS", str(queue_budget_ms))
+        get_settings.cache_clear()
+        get_admission_controller.cache_clear()
+        from app.main import app
+
+        return app
+
+    def slow_search(*args, **kwargs):
+        time.sleep(0.2)
+        return []
+
+    monkeypatch.setattr("app.main.hybrid_search", slow_search)
+    yield configure
+    get_settings.cache_clear()
+    get_admission_controller.cache_clear()
+
+
+def _post_concurrently(app, count: int) -> list[httpx.Response]:
+    async def scenario() -> list[httpx.Response]:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(
+                *[client.post("/query", json={"question": "keys"}) for _ in range(count)]
+            )
+
+    return asyncio.run(scenario())
+
+
+def test_blocking_queries_run_off_the_event_loop(slow_app) -> None:
+    app = slow_app(max_concurrency=8, queue_budget_ms=1000.0)
+    started = time.perf_counter()
+    responses = _post_concurrently(app, 8)
+    assert [response.status_code for response in responses] == [200] * 8
+    assert time.perf_counter() - started < 0.8
+
+
+def test_blocking_queries_are_shed_through_middleware(slow_app) -> None:
+    app = slow_app(max_concurrency=1, queue_budget_ms=50.0)
+    responses = _post_concurrently(app, 8)
+    assert any(response.status_code == 200 for response in responses)
+    shed = [response for response in responses if response.status_code == 503]
+    assert shed
+    assert all(response.headers["retry-after"] == "1" for response in shed)
@@ -1,5 +1,7 @@
 from fastapi.testclient import TestClient
 
+from app.core.config import get_settings
+
 
 def test_health(monkeypatch) -> None:
     monkeypatch.setattr("app.services.storage.embed_query", lambda _: [0.0, 0.0])
@@ -35,3 +37,79 @@ def test_ingest_and_query(monkeypatch) -> None:
         payload = query_response.json()
         assert "answer" in payload
         assert "citations" in payload
+
+
+def test_snapshot_requires_admin_token(monkeypatch) -> None:
+    monkeypatch.setattr("app.services.storage.embed_query", lambda _: [0.0, 0.0])
+    from app.main import app
+
+    with TestClient(app) as client:
+        response = client.get("/admin/snapshot")
+    assert response.status_code == 403
+
+
+def test_snapshot_upload_has_its_own_size_limit(monkeypatch) -> None:
+    monkeypatch.setattr("app.services.storage.embed_query", lambda _: [0.0, 0.0])
+    monkeypatch.setenv("RAG_ADMIN_TOKEN", "secret")
+    monkeypatch.setenv("RAG_REQUEST_SIZE_LIMIT_MB", "1")
+    get_settings.cache_clear()
+    from app.main import app
+
+    upload = {"file": ("rag.snapshot", b"x" * (2 * 1024 * 1024), "application/octet-stream")}
+    headers = {"x-admin-token": "secret"}
+    try:
+        with TestClient(app) as client:
+            response = client.post("/admin/snapshot", files=upload, headers=headers)
+            assert response.status_code == 400
+
+            monkeypatch.setenv("RAG_SNAPSHOT_UPLOAD_LIMIT_MB", "1")
+            get_settings.cache_clear()
+            response = client.post("/admin/snapshot", files=upload, headers=headers)
+            assert response.status_code == 413
+    finally:
+        get_settings.cache_clear()
+
+
+def test_query_field_selection(monkeypatch) -> None:
+    monkeypatch.setattr("app.services.storage.embed_query", lambda _: [0.0, 0.0])
+    monkeypatch.setattr(
+        "app.services.ingest.embed_texts",
+        lambda texts: [[1.0, 0.0] for _ in texts],
+    )
+    monkeypatch.setattr("app.services.retrieval.embed_query", lambda _: [1.0, 0.0])
+
+    from app.main import app
+
+    file_content = ("padding " * 50 + "Qdrant stores vectors. " + "padding " * 50).encode()
+    with TestClient(app) as client:
+        client.post("/ingest", files={"file": ("fields.txt", file_content, "text/plain")})
+        response = client.post(
+            "/query",
+            json={"question": "Qdrant", "fields": ["chunk_id", "snippet"], "snippet_chars": 40},
+        )
+    assert response.status_code == 200
+    citations = response.json()["citations"]
+    assert citations
+    assert all(set(citation) == {"chunk_id", "snippet"} for citation in citations)
+    assert any("Qdrant" in citation["snippet"] for citation in citations)
+    assert all(len(citation["snippet"]) <= 42 for citation in citations)
+
+    with TestClient(app) as client:
+        response = client.post("/query", json={"question": "Qdrant", "fields": []})
+    assert response.status_code == 422
+
+
+def test_query_returns_503_when_no_shard_answers(monkeypatch) -> None:
+    from app.services.storage import ShardsUnavailable
+
+    def unavailable(*args, **kwargs):
+        raise ShardsUnavailable("No shard answered the search")
+
+    monkeypatch.setattr("app.services.storage.embed_query", lambda _: [0.0, 0.0])
+    monkeypatch.setattr("app.main.hybrid_search", unavailable)
+    from app.main import app
+
+    with TestClient(app) as client:
+        response = client.post("/query", json={"question": "anything"})
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
@@ -0,0 +1,89 @@
+import asyncio
+import threading
+import time
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import pytest
+
+from app.services import embedding_server
+from app.services.embedding_server import EmbeddingClient, EmbeddingServer
+from app.services.embeddings import embed_local
+
+
+@contextmanager
+def _running_server(path: str) -> Iterator[None]:
+    server = EmbeddingServer(path, max_batch=8, max_wait_ms=5.0)
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(server.start())
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.run_until_complete(server.stop())
+        loop.close()
+
+
+@pytest.fixture
+def server_path(fake_embeddings, tmp_path):
+    path = str(tmp_path / "embed.sock")
+    with _running_server(path):
+        yield path
+
+
+def test_client_matches_local_embeddings(server_path: str) -> None:
+    client = EmbeddingClient(server_path, timeout=5.0)
+    texts = [f"document number {index} about vectors" for index in range(20)]
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(lambda text: client.embed([text])[0], texts))
+
+    expected = embed_local(texts)
+    for row, reference in zip(results, expected, strict=True):
+        assert row == pytest.approx(reference, abs=1e-6)
+    assert client.embed([]) == []
+
+
+def test_client_waits_for_server_socket(fake_embeddings, tmp_path) -> None:
+    path = str(tmp_path / "embed.sock")
+    client = EmbeddingClient(path, timeout=5.0)
+    pool = ThreadPoolExecutor(max_workers=1)
+    pending = pool.submit(client.embed, ["late start"])
+    time.sleep(0.2)
+    with _running_server(path):
+        result = pending.result()
+        pool.shutdown()
+    assert result[0] == pytest.approx(embed_local(["late start"])[0], abs=1e-6)
+
+    with pytest.raises(FileNotFoundError):
+        EmbeddingClient(str(tmp_path / "missing.sock"), timeout=0.1).embed(["text"])
+
+
+def test_concurrent_connections_share_a_batch(fake_embeddings, server_path: str) -> None:
+    batches: list[int] = []
+    encode = embedding_server._encode
+
+    def counting_encode(texts: list[str]):
+        batches.append(len(texts))
+        time.sleep(0.05)
+        return encode(texts)
+
+    fake_embeddings.setattr(embedding_server, "_encode", counting_encode)
+    client = EmbeddingClient(server_path, timeout=5.0)
+    barrier = threading.Barrier(16)
+
+    def embed(index: int) -> list[float]:
+        barrier.wait()
+        return client.embed([f"text {index}"])[0]
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        results = list(pool.map(embed, range(16)))
+
+    assert len(results) == 16
+    assert sum(batches) == 16
+    assert len(batches) < 16
+    assert max(batches) > 1
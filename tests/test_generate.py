@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+from app.services.storage import QdrantStore
+from eval.generate import SyntheticSpec, iter_synthetic, load_synthetic, write_synthetic
+
+
+def test_synthetic_corpus_is_deterministic() -> None:
+    spec = SyntheticSpec(seed=7, documents=20, vocab_size=200, question_rate=0.5)
+    first = list(iter_synthetic(spec))
+    second = list(iter_synthetic(spec))
+    assert first == second
+    assert len(first) == 20
+
+    questions = [question for _, question in first if question is not None]
+    assert questions
+    texts = {document["doc_id"]: document["text"] for document, _ in first}
+    assert all(question["answer"] in texts[question["doc_id"]] for question in questions)
+
+
+@pytest.mark.parametrize(
+    "overrides",
+    [{"zipf_exponent": -1.0}, {"doc_length_sigma": -0.5}, {"question_rate": 1.5}],
+)
+def test_invalid_spec_is_rejected(overrides: dict) -> None:
+    with pytest.raises(ValueError):
+        next(iter_synthetic(SyntheticSpec(**overrides)))
+
+
+def test_write_and_load_synthetic(fake_embeddings, tmp_path) -> None:
+    spec = SyntheticSpec(
+        seed=3, documents=12, vocab_size=100, mean_doc_words=300, question_rate=0.5
+    )
+    written = write_synthetic(spec, str(tmp_path / "corpus.jsonl"), str(tmp_path / "w.jsonl"))
+    corpus = (tmp_path / "corpus.jsonl").read_text(encoding="utf-8").splitlines()
+    assert written["documents"] == len(corpus) == 12
+    assert written["questions"] == len((tmp_path / "w.jsonl").read_text().splitlines())
+
+    store = QdrantStore()
+    store.ensure_collection()
+    loaded = load_synthetic(spec, store, str(tmp_path / "l.jsonl"), batch_size=5)
+    assert loaded["documents"] == 12
+    assert loaded["questions"] == written["questions"]
+    assert loaded["chunks"] > loaded["documents"]
+    doc_ids = {json.loads(line)["doc_id"] for line in corpus}
+    stored = [payload for _, _, payloads in store.iter_points(100) for payload in payloads]
+    assert len(stored) == loaded["chunks"]
+    assert {payload["doc_id"] for payload in stored} == doc_ids
+
+    with pytest.raises(ValueError):
+        load_synthetic(spec, store, str(tmp_path / "l.jsonl"), batch_size=0)
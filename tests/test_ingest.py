@@ -1,8 +1,8 @@
-from app.services.ingest import _split_text
+from app.services.ingest import split_text
 
 
 def test_split_text_overlap() -> None:
     text = "a" * 2000
-    chunks = _split_text(text)
+    chunks = split_text(text)
     assert len(chunks) >= 2
     assert all(chunk for chunk in chunks)
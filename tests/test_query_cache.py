@@ -0,0 +1,72 @@
+import pytest
+
+from app.core.config import get_settings
+from app.services.embeddings import embed_query
+from app.services.ingest import ingest_document
+from app.services.query_cache import SemanticCache, cache_scope, get_semantic_cache
+from app.services.retrieval import hybrid_search
+from app.services.storage import QdrantStore, ShardedStore, _mark_corpus_changed, corpus_version
+
+
+@pytest.fixture
+def semantic_cache(fake_embeddings):
+    fake_embeddings.setenv("RAG_SEMANTIC_CACHE_ENABLED", "1")
+    get_settings.cache_clear()
+    get_semantic_cache.cache_clear()
+    cache = get_semantic_cache()
+    assert cache is not None
+    yield cache
+    get_semantic_cache.cache_clear()
+
+
+def test_semantic_cache_matches_nearby_queries_in_scope() -> None:
+    cache = SemanticCache(max_entries=4, threshold=0.9, ttl_s=60.0)
+    scope = cache_scope(None, "acme", 5)
+    results = [{"chunk_id": "a-0", "snippet": "rotate keys quarterly"}]
+    cache.put([1.0, 0.0, 0.0], scope, results, latency_ms=12.5, version=corpus_version())
+
+    hit = cache.get([0.99, 0.1, 0.0], scope)
+    assert hit is not None
+    assert hit.results == results
+    assert hit.saved_ms == 12.5
+    hit.results[0]["snippet"] = "mutated"
+    assert cache.get([1.0, 0.0, 0.0], scope).results == results
+
+    assert cache.get([0.0, 1.0, 0.0], scope) is None
+    assert cache.get([1.0, 0.0, 0.0], cache_scope(None, "globex", 5)) is None
+
+
+def test_semantic_cache_invalidated_by_upserts() -> None:
+    cache = SemanticCache(max_entries=4, threshold=0.9, ttl_s=60.0)
+    scope = cache_scope(None, None, 5)
+    cache.put([1.0, 0.0], scope, [{"chunk_id": "a-0"}], latency_ms=1.0, version=corpus_version())
+    _mark_corpus_changed()
+    assert cache.get([1.0, 0.0], scope) is None
+
+    expired = SemanticCache(max_entries=4, threshold=0.9, ttl_s=0.0)
+    expired.put([1.0, 0.0], scope, [{"chunk_id": "a-0"}], latency_ms=1.0, version=corpus_version())
+    assert expired.get([1.0, 0.0], scope) is None
+
+
+def test_semantic_cache_drops_results_from_an_older_corpus() -> None:
+    cache = SemanticCache(max_entries=4, threshold=0.9, ttl_s=60.0)
+    scope = cache_scope(None, None, 5)
+    version = corpus_version()
+    _mark_corpus_changed()
+    cache.put([1.0, 0.0], scope, [{"chunk_id": "a-0"}], latency_ms=1.0, version=version)
+    assert cache.get([1.0, 0.0], scope) is None
+
+
+def test_partial_shard_results_are_not_cached(semantic_cache, make_shard) -> None:
+    healthy = QdrantStore()
+    store = ShardedStore([healthy, make_shard(fail=True)], timeout_ms=500.0)
+    store.ensure_collection()
+    ingest_document("keys.txt", b"Rotate signing keys every quarter.", healthy)
+    scope = cache_scope(None, None, get_settings().top_k)
+    vector = embed_query("rotate signing keys")
+
+    assert hybrid_search("rotate signing keys", store)
+    assert semantic_cache.get(vector, scope) is None
+
+    assert hybrid_search("rotate signing keys", healthy)
+    assert semantic_cache.get(vector, scope) is not None
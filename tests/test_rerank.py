@@ -0,0 +1,112 @@
+import pytest
+
+from app.services.rerank import (
+    CrossEncoderReranker,
+    LexicalReranker,
+    ReciprocalRankFusion,
+    RerankStage,
+)
+from app.services.storage import _mark_corpus_changed
+
+
+def _candidate(chunk_id: str, snippet: str, dense: float, keyword: float) -> dict:
+    return {
+        "chunk_id": chunk_id,
+        "snippet": snippet,
+        "score": dense,
+        "dense_score": dense,
+        "keyword_score": keyword,
+    }
+
+
+class CountingReranker(LexicalReranker):
+    def __init__(self) -> None:
+        super().__init__()
+        self.scored = 0
+
+    def score(self, query: str, candidates: list[dict]) -> list[float]:
+        self.scored += len(candidates)
+        return super().score(query, candidates)
+
+
+def test_lexical_rerank_uses_score_cache() -> None:
+    reranker = CountingReranker()
+    stage = RerankStage(reranker, budget_ms=1000.0, max_candidates=10, cache_size=10)
+    candidates = [
+        _candidate("a", "unrelated text about logging", 0.9, 0.0),
+        _candidate("b", "rotate the signing keys every quarter", 0.5, 0.5),
+    ]
+    first = stage.rerank("rotate keys", candidates)
+    second = stage.rerank("rotate keys", candidates)
+    assert [item["chunk_id"] for item in first] == ["b", "a"]
+    assert first == second
+    assert reranker.scored == 2
+
+
+def test_rerank_respects_exhausted_budget() -> None:
+    stage = RerankStage(LexicalReranker(), budget_ms=10.0, max_candidates=10, cache_size=10)
+    candidates = [_candidate("a", "alpha", 0.9, 0.0), _candidate("b", "beta", 0.1, 1.0)]
+    assert stage.rerank("beta", candidates, spent_ms=25.0) == candidates
+
+    stage.ms_per_candidate = 10.0
+    assert stage.candidate_limit(top_k=1) == 1
+    reranked = stage.rerank("beta", candidates, spent_ms=0.0)
+    assert [item["chunk_id"] for item in reranked] == ["a", "b"]
+    assert reranked[1] is candidates[1]
+
+
+def test_reciprocal_rank_fusion_rewards_agreement() -> None:
+    fusion = ReciprocalRankFusion(k=60)
+    candidates = [
+        _candidate("a", "", 0.9, 0.0),
+        _candidate("b", "", 0.8, 0.9),
+        _candidate("c", "", 0.1, 0.5),
+    ]
+    scores = fusion.score("query", candidates)
+    assert max(range(3), key=lambda i: scores[i]) == 1
+
+
+def test_rerank_keeps_score_monotonic() -> None:
+    stage = RerankStage(LexicalReranker(), budget_ms=1000.0, max_candidates=10, cache_size=10)
+    stage.ms_per_candidate = 250.0
+    candidates = [
+        _candidate("a", "nothing relevant here", 0.9, 0.0),
+        _candidate("b", "rotate the signing keys", 0.4, 0.5),
+        _candidate("c", "rotate keys", 0.8, 0.1),
+        _candidate("d", "keys", 0.85, 0.2),
+        _candidate("e", "keys rotate", 0.7, 0.2),
+    ]
+    reranked = stage.rerank("rotate keys", candidates)
+    scores = [item["score"] for item in reranked]
+    assert scores == sorted(scores, reverse=True)
+    assert all(0.0 <= score <= 1.0 for score in scores)
+    assert [item.get("rerank_score") is not None for item in reranked] == [True] * 4 + [False]
+
+
+def test_rerank_cache_cleared_when_corpus_changes() -> None:
+    reranker = CountingReranker()
+    stage = RerankStage(reranker, budget_ms=1000.0, max_candidates=10, cache_size=10)
+    candidates = [_candidate("a", "rotate keys", 0.9, 0.0)]
+    stage.rerank("rotate keys", candidates)
+    _mark_corpus_changed()
+    stage.rerank("rotate keys", candidates)
+    assert reranker.scored == 2
+
+
+def test_rerank_score_mapping_is_fixed_per_reranker() -> None:
+    stage = RerankStage(LexicalReranker(), budget_ms=1000.0, max_candidates=10, cache_size=10)
+    candidates = [
+        _candidate("a", "rotate the signing keys", 0.4, 0.5),
+        _candidate("b", "rotate signing keys now", 0.4, 0.5),
+    ]
+    reranked = stage.rerank("rotate keys", candidates)
+    # Close raw scores stay close rather than being stretched to 1.0 and 0.0.
+    assert [item["score"] for item in reranked] == [
+        pytest.approx(item["rerank_score"]) for item in reranked
+    ]
+    assert reranked[-1]["score"] > 0.0
+
+    assert CrossEncoderReranker().normalise(0.0) == 0.5
+    assert CrossEncoderReranker().normalise(8.0) > CrossEncoderReranker().normalise(7.9)
+    fusion = ReciprocalRankFusion(k=60)
+    assert fusion.normalise(2.0 / 61) == pytest.approx(1.0)
@@ -0,0 +1,14 @@
+from app.services.retrieval import window_snippet
+
+
+def test_window_snippet_centres_on_query_terms() -> None:
+    text = " ".join(["filler"] * 100 + ["rotate", "the", "signing", "keys"] + ["filler"] * 100)
+    snippet = window_snippet(text, "How do I rotate signing keys?", 60)
+    assert "rotate the signing keys" in snippet
+    assert snippet.startswith("…") and snippet.endswith("…")
+    assert len(snippet) <= 62
+
+
+def test_window_snippet_keeps_short_text() -> None:
+    assert window_snippet("short chunk", "chunk", 60) == "short chunk"
+    assert window_snippet("x " * 100, "chunk", 0) == "x " * 100
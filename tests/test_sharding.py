@@ -0,0 +1,94 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.core.config import get_settings
+from app.services.embeddings import embed_texts
+from app.services.ingest import build_chunk_payloads
+from app.services.retrieval import hybrid_search
+from app.services.storage import (
+    QdrantStore,
+    ShardedStore,
+    ShardsUnavailable,
+    get_store,
+    search_was_partial,
+)
+
+
+def _ingest(store) -> None:
+    # Fixed ids keep the hash routing, and so the per-shard layout, deterministic.
+    for index in range(12):
+        chunks = [f"Runbook {index} explains how to rotate credentials safely."]
+        ids, payloads = build_chunk_payloads(f"runbook-{index}", f"runbook_{index}.md", chunks)
+        store.upsert(ids, embed_texts(chunks), payloads)
+
+
+def test_sharded_search_matches_single_store(fake_embeddings) -> None:
+    fake_embeddings.setenv("RAG_SHARD_COUNT", "3")
+    get_settings.cache_clear()
+    sharded = get_store()
+    assert isinstance(sharded, ShardedStore)
+    single = QdrantStore()
+    for store in (sharded, single):
+        store.ensure_collection()
+        _ingest(store)
+
+    assert all(len(list(shard.iter_points(100))) for shard in sharded.shards)
+    sharded_scores = [hit["score"] for hit in hybrid_search("rotate credentials", sharded)]
+    single_scores = [hit["score"] for hit in hybrid_search("rotate credentials", single)]
+    assert sharded_scores == pytest.approx(single_scores)
+
+
+def test_slow_shard_degrades_to_partial_results(make_shard) -> None:
+    fast, slow = make_shard(), make_shard(delay_s=0.5)
+    store = ShardedStore([fast, slow], timeout_ms=100.0)
+    store.ensure_collection()
+    _ingest(store)
+
+    started = time.perf_counter()
+    results = hybrid_search("rotate credentials", store)
+    assert time.perf_counter() - started < 0.4
+    fast_ids = {
+        payload["chunk_id"] for _, _, payloads in fast.iter_points(100) for payload in payloads
+    }
+    assert results
+    assert {item["chunk_id"] for item in results} <= fast_ids
+    assert search_was_partial(store)
+
+
+def test_concurrent_healthy_searches_are_not_dropped(make_shard) -> None:
+    store = ShardedStore([make_shard(delay_s=0.05), make_shard(delay_s=0.05)], timeout_ms=500.0)
+    store.ensure_collection()
+    _ingest(store)
+    vector = embed_texts(["rotate credentials"])[0]
+
+    def search(_: int) -> bool:
+        results = store.search(vector, 5)
+        return bool(results) and not search_was_partial(store)
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        assert all(pool.map(search, range(16)))
+
+
+def test_stuck_shard_is_skipped_without_starving_healthy_shards(make_shard) -> None:
+    fast, slow = make_shard(), make_shard(delay_s=0.5)
+    store = ShardedStore([fast, slow], timeout_ms=20.0, max_workers=4)
+    store.ensure_collection()
+    _ingest(store)
+    vector = embed_texts(["rotate credentials"])[0]
+
+    started = time.perf_counter()
+    for _ in range(12):
+        assert store.search(vector, 5)
+    # Once the slow shard's workers are all stuck past the timeout it is
+    # skipped outright instead of being waited on.
+    assert time.perf_counter() - started < 0.4
+    assert search_was_partial(store)
+
+
+def test_search_raises_when_no_shard_answers(make_shard) -> None:
+    store = ShardedStore([make_shard(fail=True), make_shard(fail=True)], timeout_ms=100.0)
+    store.ensure_collection()
+    with pytest.raises(ShardsUnavailable):
+        store.search(embed_texts(["rotate credentials"])[0], 5)
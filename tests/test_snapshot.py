@@ -0,0 +1,60 @@
+import io
+
+import pytest
+
+from app.services.ingest import ingest_document
+from app.services.snapshot import iter_snapshot, load_snapshot
+from app.services.storage import QdrantStore
+
+
+@pytest.fixture
+def store(fake_embeddings) -> QdrantStore:
+    store = QdrantStore()
+    store.ensure_collection()
+    return store
+
+
+def _points(store: QdrantStore) -> dict:
+    points = {}
+    for ids, vectors, payloads in store.iter_points(batch_size=2):
+        for point_id, vector, payload in zip(ids, vectors, payloads, strict=True):
+            points[point_id] = (vector, payload)
+    return points
+
+
+def test_snapshot_round_trip(store: QdrantStore) -> None:
+    ingest_document("a.txt", b"Snapshots bootstrap replicas quickly. " * 40, store, "acme")
+    ingest_document("b.txt", b"Shared operations runbook.", store)
+    snapshot = b"".join(iter_snapshot(store, batch_size=2))
+
+    replica = QdrantStore()
+    replica.ensure_collection()
+    original = _points(store)
+    assert load_snapshot(replica, io.BytesIO(snapshot)) == len(original)
+    restored = _points(replica)
+    assert restored.keys() == original.keys()
+    for point_id, (vector, payload) in original.items():
+        assert restored[point_id][0] == pytest.approx(vector, abs=1e-6)
+        assert restored[point_id][1] == payload
+
+
+def test_snapshot_rejects_corruption(store: QdrantStore) -> None:
+    ingest_document("a.txt", b"Checksums guard snapshot integrity.", store)
+    snapshot = bytearray(b"".join(iter_snapshot(store)))
+    snapshot[20] ^= 0xFF
+
+    with pytest.raises(ValueError):
+        load_snapshot(QdrantStore(), io.BytesIO(bytes(snapshot)))
+    with pytest.raises(ValueError):
+        load_snapshot(QdrantStore(), io.BytesIO(bytes(snapshot[:-10])))
+
+
+def test_snapshot_with_bad_footer_loads_nothing(store: QdrantStore) -> None:
+    ingest_document("a.txt", b"Verified before any block is applied. " * 40, store)
+    snapshot = b"".join(iter_snapshot(store, batch_size=1))
+
+    replica = QdrantStore()
+    replica.ensure_collection()
+    with pytest.raises(ValueError):
+        load_snapshot(replica, io.BytesIO(snapshot[:-1] + bytes([snapshot[-1] ^ 0xFF])))
+    assert _points(replica) == {}
@@ -0,0 +1,67 @@
+import pytest
+
+from app.core.config import get_settings
+from app.services.ingest import ingest_document
+from app.services.retrieval import hybrid_search
+from app.services.storage import QdrantStore, bounded_identifier, partition_name
+
+
+def _ingest_tenants(store: QdrantStore) -> None:
+    ingest_document("acme.txt", b"Acme rotates signing keys every quarter.", store, "acme")
+    ingest_document("globex.txt", b"Globex rotates signing keys every month.", store, "globex")
+    ingest_document("shared.txt", b"Shared runbook for rotating keys.", store)
+
+
+@pytest.mark.parametrize("partitioned", [False, True])
+def test_search_is_scoped_to_tenant(fake_embeddings, partitioned: bool) -> None:
+    fake_embeddings.setenv("RAG_TENANT_PARTITIONING", "1" if partitioned else "0")
+    get_settings.cache_clear()
+    store = QdrantStore()
+    store.ensure_collection()
+    _ingest_tenants(store)
+
+    results = hybrid_search("rotate signing keys", store, tenant="acme")
+    assert {item["source"] for item in results} == {"acme.txt"}
+    assert hybrid_search("rotate signing keys", store, tenant="initech") == []
+
+    filtered = hybrid_search("rotate keys", store, filters={"source": ["shared.txt"]})
+    assert {item["source"] for item in filtered} == {"shared.txt"}
+
+
+def test_filters_must_target_indexed_fields(fake_embeddings) -> None:
+    store = QdrantStore()
+    store.ensure_collection()
+    with pytest.raises(ValueError):
+        hybrid_search("keys", store, filters={"text": "keys"})
+
+
+def test_long_partition_names_stay_distinct(fake_embeddings) -> None:
+    fake_embeddings.setenv("RAG_TENANT_PARTITIONING", "1")
+    get_settings.cache_clear()
+    prefix = "tenant_" + "x" * 50
+    names = [partition_name("chunks", f"{prefix}_{suffix}") for suffix in ("a", "b")]
+    assert names[0] != names[1]
+    assert all(len(name) <= 63 for name in names)
+    assert partition_name("chunks", "acme") == "chunks__acme"
+
+    indexes = {bounded_identifier(f"{name}_{field}_idx") for name in names for field in ("a", "b")}
+    assert len(indexes) == 4
+    assert all(len(index) <= 63 for index in indexes)
+
+
+def test_payload_indexes_added_to_existing_collections(fake_embeddings) -> None:
+    store = QdrantStore()
+    store.ensure_collection()
+    calls: list[tuple[str, str]] = []
+    fake_embeddings.setattr(
+        store.client,
+        "create_payload_index",
+        lambda collection_name, field_name, field_schema: calls.append(
+            (collection_name, field_name)
+        ),
+    )
+    restarted = QdrantStore()
+    restarted.client = store.client
+    restarted.index_fields = ["tenant", "source"]
+    restarted.ensure_collection()
+    assert calls == [(store.collection, "tenant"), (store.collection, "source")]